@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import messagebox
 import time
 import random
+import itertools
+
+import numpy as np
 
 
 
@@ -9,18 +12,18 @@ class Heap:
     def __init__(self, mode="max"):
         self.array = []  
         self.mode = mode  
+        self.sequence = itertools.count()
 
     def __len__(self):
         return len(self.array)
 
     def compare(self, a, b):
-        if self.mode == "max":
-            return a.performance_metric() > b.performance_metric()
-        else:
-            return a.performance_metric() < b.performance_metric()
+        return a < b
 
     def push(self, item):
-        self.array.append(item)
+        metric = item.performance_metric()
+        key = -metric if self.mode == "max" else metric
+        self.array.append((key, next(self.sequence), item))
         self._bubble_up(len(self.array) - 1)
 
     def _bubble_up(self, index):
@@ -37,7 +40,7 @@ class Heap:
         self.array[0] = self.array[-1]
         self.array.pop()
         self._bubble_down(0)
-        return root
+        return root[2]
 
     def _bubble_down(self, index):
         last_index = len(self.array) - 1
@@ -56,7 +59,7 @@ class Heap:
             index = candidate
 
     def peek(self):
-        return self.array[0] if self.array else None
+        return self.array[0][2] if self.array else None
 
 class DynamicArray:
     def __init__(self):
@@ -88,8 +91,7 @@ class DynamicArray:
     
     def _resize(self, new_capacity):
         new_array = [None] * new_capacity
-        for i in range(self.size):
-            new_array[i] = self.array[i]
+        new_array[:self.size] = self.array[:self.size]
         self.array = new_array
         self.capacity = new_capacity
     
@@ -98,6 +100,8 @@ class DynamicArray:
             yield self.array[i]
 
 class Trade:
+    __slots__ = ("timestamp", "symbol", "price", "volume")
+
     def __init__(self, timestamp, symbol, price, volume):
         self.timestamp = timestamp    
         self.symbol = symbol         
@@ -201,11 +205,11 @@ def simulate_price_update(trade, max_fluctuation=0.05):
     factor = 1 + random.uniform(-max_fluctuation, max_fluctuation)
     return trade.price * factor
 
-def update_all_trades():
+def update_all_trades(max_fluctuation=0.05):
     global all_trades, tracker, portfolio
-    for trade in all_trades:
-        new_price = simulate_price_update(trade)
-        trade.price = new_price
+    factors = 1 + price_generator.uniform(-max_fluctuation, max_fluctuation, len(all_trades))
+    for trade, factor in zip(all_trades, factors.tolist()):
+        trade.price *= factor
     tracker = TransactionTracker()
     portfolio = PortfolioManager()
     for trade in all_trades:
@@ -214,39 +218,12 @@ def update_all_trades():
     update_display("Prices updated for all trades.")
 
 
+price_generator = np.random.default_rng()
 tracker = TransactionTracker()      
 portfolio = PortfolioManager()    
 all_trades = DynamicArray()         
 
 
-root = tk.Tk()
-root.title("Stock Market Trading Tracker")
-root.geometry("600x500")
-root.configure(bg="#f5f5f5")
-
-input_frame = tk.Frame(root, bg="#fff", bd=1, relief=tk.SOLID, padx=10, pady=10)
-input_frame.pack(pady=20, padx=20, fill=tk.X)
-
-output_frame = tk.Frame(root, bg="#fafafa", bd=1, relief=tk.SOLID, padx=10, pady=10)
-output_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
-
-tk.Label(input_frame, text="Stock Symbol:", font=("Arial", 10), bg="#fff").grid(row=0, column=0, sticky="w")
-symbol_entry = tk.Entry(input_frame, font=("Arial", 10))
-symbol_entry.grid(row=0, column=1, padx=5, pady=5)
-
-tk.Label(input_frame, text="Price:", font=("Arial", 10), bg="#fff").grid(row=1, column=0, sticky="w")
-price_entry = tk.Entry(input_frame, font=("Arial", 10))
-price_entry.grid(row=1, column=1, padx=5, pady=5)
-price_entry.insert(0, "100")
-
-tk.Label(input_frame, text="Volume:", font=("Arial", 10), bg="#fff").grid(row=2, column=0, sticky="w")
-volume_entry = tk.Entry(input_frame, font=("Arial", 10))
-volume_entry.grid(row=2, column=1, padx=5, pady=5)
-volume_entry.insert(0, "10")
-
-output_text = tk.Text(output_frame, wrap=tk.WORD, font=("Arial", 10))
-output_text.pack(fill=tk.BOTH, expand=True)
-
 def update_display(message=""):
     output_text.delete(1.0, tk.END)
     if message:
@@ -296,18 +273,50 @@ def update_prices():
 def view_all_trades():
     update_display("Viewing all trades:")
 
-button_frame = tk.Frame(input_frame, bg="#fff")
-button_frame.grid(row=3, column=0, columnspan=2, pady=10)
+def main():
+    global root, symbol_entry, price_entry, volume_entry, output_text
+    root = tk.Tk()
+    root.title("Stock Market Trading Tracker")
+    root.geometry("600x500")
+    root.configure(bg="#f5f5f5")
+
+    input_frame = tk.Frame(root, bg="#fff", bd=1, relief=tk.SOLID, padx=10, pady=10)
+    input_frame.pack(pady=20, padx=20, fill=tk.X)
+
+    output_frame = tk.Frame(root, bg="#fafafa", bd=1, relief=tk.SOLID, padx=10, pady=10)
+    output_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+
+    tk.Label(input_frame, text="Stock Symbol:", font=("Arial", 10), bg="#fff").grid(row=0, column=0, sticky="w")
+    symbol_entry = tk.Entry(input_frame, font=("Arial", 10))
+    symbol_entry.grid(row=0, column=1, padx=5, pady=5)
+
+    tk.Label(input_frame, text="Price:", font=("Arial", 10), bg="#fff").grid(row=1, column=0, sticky="w")
+    price_entry = tk.Entry(input_frame, font=("Arial", 10))
+    price_entry.grid(row=1, column=1, padx=5, pady=5)
+    price_entry.insert(0, "100")
+
+    tk.Label(input_frame, text="Volume:", font=("Arial", 10), bg="#fff").grid(row=2, column=0, sticky="w")
+    volume_entry = tk.Entry(input_frame, font=("Arial", 10))
+    volume_entry.grid(row=2, column=1, padx=5, pady=5)
+    volume_entry.insert(0, "10")
+
+    output_text = tk.Text(output_frame, wrap=tk.WORD, font=("Arial", 10))
+    output_text.pack(fill=tk.BOTH, expand=True)
+
+    button_frame = tk.Frame(input_frame, bg="#fff")
+    button_frame.grid(row=3, column=0, columnspan=2, pady=10)
 
-add_button = tk.Button(button_frame, text="Add Trade", bg="#4CAF50", fg="#fff", padx=10, command=add_trade)
-add_button.pack(side=tk.LEFT, padx=5)
+    add_button = tk.Button(button_frame, text="Add Trade", bg="#4CAF50", fg="#fff", padx=10, command=add_trade)
+    add_button.pack(side=tk.LEFT, padx=5)
 
-update_button = tk.Button(button_frame, text="Update Prices", bg="#FF9800", fg="#fff", padx=10, command=update_prices)
-update_button.pack(side=tk.LEFT, padx=5)
+    update_button = tk.Button(button_frame, text="Update Prices", bg="#FF9800", fg="#fff", padx=10, command=update_prices)
+    update_button.pack(side=tk.LEFT, padx=5)
 
-view_button = tk.Button(button_frame, text="View All Trades", bg="#2196F3", fg="#fff", padx=10, command=view_all_trades)
-view_button.pack(side=tk.LEFT, padx=5)
+    view_button = tk.Button(button_frame, text="View All Trades", bg="#2196F3", fg="#fff", padx=10, command=view_all_trades)
+    view_button.pack(side=tk.LEFT, padx=5)
 
+    root.mainloop()
 
 
-root.mainloop()
+if __name__ == "__main__":
+    main()
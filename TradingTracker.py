@@ -1,182 +1,215 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import random
-import time
-from datetime import datetime
-
-import matplotlib
-matplotlib.use("TkAgg")
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.dates as mdates
-
-class Trade:
-    def __init__(self, timestamp, symbol, price, volume, original_price, trade_type):
-        self.timestamp = timestamp
-        self.symbol = symbol
-        self.price = price
-        self.volume = volume
-        self.original_price = original_price
-        self.trade_type = trade_type
-
-    def performance_metric(self):
-        return (self.price - self.original_price) * self.volume
-
-    def reduce_volume(self, amount):
-        self.volume -= amount
-        if self.volume < 0:
-            self.volume = 0
-
-    def __str__(self):
-        return (f"Trade(Symbol: {self.symbol}, Type: {self.trade_type}, Price: {self.price:.2f}, "
-                f"Volume: {self.volume}, Orig.Price: {self.original_price:.2f}, Time: {self.timestamp:.2f})")
-
-class Heap:
-    def __init__(self, comparator):
-        self.data = []
-        self.comparator = comparator
-
-    def push(self, item):
-        self.data.append(item)
-        self._sift_up(len(self.data) - 1)
-
-    def pop(self):
-        if not self.data:
-            return None
-        top_item = self.data[0]
-        self.data[0] = self.data[-1]
-        self.data.pop()
-        self._sift_down(0)
-        return top_item
-
-    def peek(self):
-        if not self.data:
-            return None
-        return self.data[0]
-
-    def _sift_up(self, index):
-        parent_index = (index - 1) // 2
-        while index > 0 and self.comparator(self.data[index], self.data[parent_index]):
-            self.data[index], self.data[parent_index] = self.data[parent_index], self.data[index]
-            index = parent_index
-            parent_index = (index - 1) // 2
-
-    def _sift_down(self, index):
-        total_items = len(self.data)
-        while True:
-            left_index = 2 * index + 1
-            right_index = 2 * index + 2
-            best_index = index
-            if left_index < total_items and self.comparator(self.data[left_index], self.data[best_index]):
-                best_index = left_index
-            if right_index < total_items and self.comparator(self.data[right_index], self.data[best_index]):
-                best_index = right_index
-            if best_index == index:
-                break
-            self.data[index], self.data[best_index] = self.data[best_index], self.data[index]
-            index = best_index
-
-class TransactionTracker:
-    def __init__(self):
-        self.trades = []
-        self.best_heap = Heap(lambda first_trade, second_trade: first_trade.performance_metric() > second_trade.performance_metric())
-        self.worst_heap = Heap(lambda first_trade, second_trade: first_trade.performance_metric() < second_trade.performance_metric())
-
-    def add_trade(self, trade):
-        self.trades.append(trade)
-        self.best_heap.push(trade)
-        self.worst_heap.push(trade)
-
-    def get_best_trade(self):
-        return self.best_heap.peek()
-
-    def get_worst_trade(self):
-        return self.worst_heap.peek()
-
-class AVLNode:
-    def __init__(self, key, trade):
-        self.key = key
-        self.trade = trade
-        self.height = 1
-        self.left = None
-        self.right = None
-
-class PortfolioManager:
-    def __init__(self):
-        self.root = None
-
-    def get_height(self, node):
-        return node.height if node else 0
-
-    def get_balance(self, node):
-        return self.get_height(node.left) - self.get_height(node.right) if node else 0
-
-    def right_rotate(self, node_y):
-        node_x = node_y.left
-        subtree_T2 = node_x.right
-        node_x.right = node_y
-        node_y.left = subtree_T2
-        node_y.height = 1 + max(self.get_height(node_y.left), self.get_height(node_y.right))
-        node_x.height = 1 + max(self.get_height(node_x.left), self.get_height(node_x.right))
-        return node_x
-
-    def left_rotate(self, node_x):
-        node_y = node_x.right
-        subtree_T2 = node_y.left
-        node_y.left = node_x
-        node_x.right = subtree_T2
-        node_x.height = 1 + max(self.get_height(node_x.left), self.get_height(node_x.right))
-        node_y.height = 1 + max(self.get_height(node_y.left), self.get_height(node_y.right))
-        return node_y
-
-    def insert_node(self, current_node, key, trade):
-        if not current_node:
-            return AVLNode(key, trade)
-        if key < current_node.key:
-            current_node.left = self.insert_node(current_node.left, key, trade)
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import os
+import queue
+
+import numpy as np
+
+from engine import PriceUpdateWorker
+from feed import DEFAULT_HOST, DEFAULT_PORT, FeedIngestor, ReplayFileSource, SocketSource
+from instrumentation import Instrumentation
+from journal import recover
+from trade_io import import_trades, export_trades
+
+class VirtualTradeTable:
+    DEFAULT_ROW_HEIGHT = 20
+    HEADING_HEIGHT = 25
+
+    def __init__(self, tree, scrollbar, trades):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.trades = trades
+        self.columns = tree["columns"]
+        self.first_row = 0
+        self.visible_rows = 30
+        self.rendered_rows = {}
+        self.rendered_trades = {}
+        self.scrollbar.configure(command=self.on_scroll)
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_by(-1 if event.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-1))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(1))
+
+    @staticmethod
+    def row_values(trade):
+        return (
+            f"{trade.timestamp:.2f}",
+            trade.symbol,
+            trade.trade_type,
+            f"{trade.price:.2f}",
+            str(trade.volume),
+            f"{trade.original_price:.2f}",
+            f"{trade.performance_metric():.2f}"
+        )
+
+    def trade_for_iid(self, iid):
+        return self.rendered_trades.get(iid)
+
+    def row_height(self):
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        return int(row_height) if row_height else self.DEFAULT_ROW_HEIGHT
+
+    def on_resize(self, event):
+        visible_rows = max(1, (event.height - self.HEADING_HEIGHT) // self.row_height())
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh()
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.trades)))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible_rows)
+        else:
+            self.scroll_by(int(amount))
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first_row + rows)
+
+    def scroll_to(self, first_row):
+        self.first_row = first_row
+        self.refresh()
+
+    def refresh(self):
+        total_rows = len(self.trades)
+        self.first_row = max(0, min(self.first_row, total_rows - self.visible_rows))
+        last_row = min(total_rows, self.first_row + self.visible_rows)
+        window_trades = {str(trade.trade_id): trade for trade in map(self.trades.__getitem__, range(self.first_row, last_row))}
+        stale_iids = self.rendered_rows.keys() - window_trades.keys()
+        if stale_iids:
+            self.tree.delete(*stale_iids)
+            for iid in stale_iids:
+                del self.rendered_rows[iid]
+        self.rendered_trades = window_trades
+        for position, (iid, trade) in enumerate(window_trades.items()):
+            values = self.row_values(trade)
+            rendered_values = self.rendered_rows.get(iid)
+            if rendered_values is None:
+                self.tree.insert("", position, iid=iid, values=values)
+            elif rendered_values != values:
+                for column, rendered_value, value in zip(self.columns, rendered_values, values):
+                    if rendered_value != value:
+                        self.tree.set(iid, column, value)
+            self.rendered_rows[iid] = values
+        if total_rows:
+            self.scrollbar.set(self.first_row / total_rows, last_row / total_rows)
         else:
-            current_node.right = self.insert_node(current_node.right, key, trade)
-        current_node.height = 1 + max(self.get_height(current_node.left), self.get_height(current_node.right))
-        balance_factor = self.get_balance(current_node)
-        if balance_factor > 1 and key < current_node.left.key:
-            return self.right_rotate(current_node)
-        if balance_factor < -1 and key > current_node.right.key:
-            return self.left_rotate(current_node)
-        if balance_factor > 1 and key > current_node.left.key:
-            current_node.left = self.left_rotate(current_node.left)
-            return self.right_rotate(current_node)
-        if balance_factor < -1 and key < current_node.right.key:
-            current_node.right = self.right_rotate(current_node.right)
-            return self.left_rotate(current_node)
-        return current_node
-
-    def add_trade(self, trade):
-        self.root = self.insert_node(self.root, trade.timestamp, trade)
-
-    def inorder_traversal(self, node, result):
-        if node:
-            self.inorder_traversal(node.left, result)
-            result.append(node.trade)
-            self.inorder_traversal(node.right, result)
-
-    def get_inorder(self):
-        result = []
-        self.inorder_traversal(self.root, result)
-        return result
+            self.scrollbar.set(0.0, 1.0)
+
+class CandleChart:
+    UP_COLOR = "seagreen"
+    DOWN_COLOR = "firebrick"
+    BODY_WIDTH = 0.8
+    X_HEADROOM = 0.25
+    Y_MARGIN = 0.1
+    SECONDS_PER_DAY = 86400.0
+
+    def __init__(self, master):
+        import matplotlib
+        matplotlib.use("TkAgg")
+        import matplotlib.dates as mdates
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.colors import to_rgba_array
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=(4, 3), dpi=100, layout="constrained")
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_title("Stock Price vs Time")
+        self.ax.set_xlabel("Time")
+        self.ax.set_ylabel("Price")
+        date_locator = mdates.AutoDateLocator()
+        self.ax.xaxis.set_major_locator(date_locator)
+        self.ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(date_locator))
+        self.colors = to_rgba_array([self.DOWN_COLOR, self.UP_COLOR])
+        self.wicks = LineCollection([], linewidths=1, animated=True)
+        self.bodies = PolyCollection([], linewidths=0.5, animated=True)
+        self.ax.add_collection(self.wicks)
+        self.ax.add_collection(self.bodies)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+        self.background = None
+        self.view = None
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_candles()
+
+    def draw_candles(self):
+        self.ax.draw_artist(self.wicks)
+        self.ax.draw_artist(self.bodies)
+
+    def show(self, symbol, candles, period):
+        x_values = candles["start"] / self.SECONDS_PER_DAY
+        half_width = self.BODY_WIDTH * period / self.SECONDS_PER_DAY / 2
+        opens, highs, lows, closes = candles["open"], candles["high"], candles["low"], candles["close"]
+        self.wicks.set_segments(np.stack((np.column_stack((x_values, lows)), np.column_stack((x_values, highs))), axis=1))
+        bottoms = np.minimum(opens, closes)
+        tops = np.maximum(opens, closes)
+        self.bodies.set_verts(np.stack((
+            np.column_stack((x_values - half_width, bottoms)),
+            np.column_stack((x_values - half_width, tops)),
+            np.column_stack((x_values + half_width, tops)),
+            np.column_stack((x_values + half_width, bottoms)),
+        ), axis=1))
+        candle_colors = self.colors[(closes >= opens).astype(np.intp)]
+        self.wicks.set_color(candle_colors)
+        self.bodies.set_facecolor(candle_colors)
+        self.bodies.set_edgecolor(candle_colors)
+        if (symbol, period) != self.view or self.background is None or not self.fits(x_values, lows, highs, period):
+            self.view = (symbol, period)
+            self.ax.set_title(f"{symbol} Price vs Time")
+            self.set_limits(x_values, lows, highs, period)
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_candles()
+        self.canvas.blit(self.ax.bbox)
+
+    def fits(self, x_values, lows, highs, period):
+        if len(x_values) == 0:
+            return True
+        left, right = self.ax.get_xlim()
+        bottom, top = self.ax.get_ylim()
+        period_days = period / self.SECONDS_PER_DAY
+        return (left <= x_values[0] - period_days / 2 <= left + 2 * self.X_HEADROOM * (right - left)
+                and x_values[-1] + period_days / 2 <= right
+                and bottom <= lows.min() and highs.max() <= top)
+
+    def set_limits(self, x_values, lows, highs, period):
+        if len(x_values) == 0:
+            return
+        period_days = period / self.SECONDS_PER_DAY
+        left = x_values[0] - period_days
+        right = x_values[-1] + period_days
+        self.ax.set_xlim(left, right + max((right - left) * self.X_HEADROOM, 5 * period_days))
+        low = lows.min()
+        high = highs.max()
+        margin = (high - low) * self.Y_MARGIN or abs(high) * 0.01 or 1.0
+        self.ax.set_ylim(low - margin, high + margin)
 
 class TradingTracker(tk.Tk):
-    CANDLE_PERIOD = 10
+    PRICE_UPDATE_INTERVAL = 5.0
+    DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trading_data")
+    RESULT_POLL_MS = 100
+    PERFORMANCE_REFRESH_MS = 1000
+    CHART_CANDLES = 200
+    CHART_RESOLUTIONS = {"10s": 10, "1m": 60, "5m": 300, "1h": 3600}
+    LEADERBOARD_SIZE = 5
 
     def __init__(self):
         super().__init__()
         self.attributes("-fullscreen", True)
-        self.transaction_tracker = TransactionTracker()
-        self.portfolio_manager = PortfolioManager()
-        self.all_trades = []
-        self.random_generator = random.Random()
-        self.wallet = 10000.0
-        self.stock_history = {}
+        self.engine = recover(self.DATA_DIRECTORY)
         self.current_symbol = None
+        self.worker_results = queue.Queue()
+        self.feed_ingestor = None
+        self.last_worker_error = None
+        self.price_worker = PriceUpdateWorker(lambda: self.engine.price_tick(), self.worker_results, self.engine.lock, self.PRICE_UPDATE_INTERVAL)
+        self.instrumentation = Instrumentation()
+        self.instrumentation.instrument_engine(self.engine)
+        for method_name in ("refresh_table", "update_summary", "update_stock_list", "plot_stock_history"):
+            self.instrumentation.instrument(self, method_name, f"ui.{method_name}")
         main_panel = tk.Frame(self, padx=10, pady=10)
         main_panel.pack(fill=tk.BOTH, expand=True)
         top_panel = tk.Frame(main_panel)
@@ -201,10 +234,16 @@ class TradingTracker(tk.Tk):
         self.sell_button = tk.Button(button_panel, text="Sell Stock", command=self.sell_trade, bg="tomato", **button_options)
         self.update_all_button = tk.Button(button_panel, text="Update All Prices", command=self.update_all_prices, bg="lightblue", **button_options)
         self.update_selected_button = tk.Button(button_panel, text="Update Selected Stock", command=self.update_selected_stock, bg="orange", **button_options)
+        self.import_button = tk.Button(button_panel, text="Import Trades", command=self.import_trades, bg="khaki", **button_options)
+        self.export_button = tk.Button(button_panel, text="Export Trades", command=self.export_trades, bg="khaki", **button_options)
+        self.feed_button = tk.Button(button_panel, text="Connect Feed", command=self.toggle_feed, bg="plum", **button_options)
         self.add_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
         self.sell_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
         self.update_all_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
         self.update_selected_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
+        self.import_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
+        self.export_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
+        self.feed_button.pack(side=tk.LEFT, expand=True, padx=15, pady=5)
         center_pane = ttk.PanedWindow(main_panel, orient=tk.HORIZONTAL)
         center_pane.pack(fill=tk.BOTH, expand=True)
         left_frame = tk.Frame(center_pane)
@@ -217,9 +256,9 @@ class TradingTracker(tk.Tk):
             self.trade_table.heading(column, text=column)
             self.trade_table.column(column, anchor="center")
         self.trade_table.pack(fill=tk.BOTH, expand=True)
-        vertical_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.trade_table.yview)
-        self.trade_table.configure(yscrollcommand=vertical_scrollbar.set)
+        vertical_scrollbar = ttk.Scrollbar(table_frame, orient="vertical")
         vertical_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.trade_table_view = VirtualTradeTable(self.trade_table, vertical_scrollbar, self.engine.all_trades)
         right_frame = tk.Frame(center_pane)
         center_pane.add(right_frame, weight=1)
         stock_list_frame = tk.LabelFrame(right_frame, text="Stocks", padx=5, pady=5)
@@ -229,32 +268,180 @@ class TradingTracker(tk.Tk):
         self.stock_listbox.bind("<<ListboxSelect>>", self.on_stock_select)
         self.selected_stock_label = tk.Label(stock_list_frame, text="Selected Stock: None", font=("Helvetica", 10, "bold"))
         self.selected_stock_label.pack(pady=(0, 5))
-        graph_frame = tk.LabelFrame(right_frame, text="Price vs Time", padx=5, pady=5)
-        graph_frame.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
-        self.figure = Figure(figsize=(4, 3), dpi=100)
-        self.ax = self.figure.add_subplot(111)
-        self.ax.set_title("Stock Price vs Time")
-        self.ax.set_xlabel("Time")
-        self.ax.set_ylabel("Price")
-        self.canvas = FigureCanvasTkAgg(self.figure, master=graph_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.graph_frame = tk.LabelFrame(right_frame, text="Price vs Time", padx=5, pady=5)
+        self.graph_frame.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        resolution_panel = tk.Frame(self.graph_frame)
+        resolution_panel.pack(fill=tk.X)
+        tk.Label(resolution_panel, text="Resolution:").pack(side=tk.LEFT, padx=5)
+        self.resolution_field = ttk.Combobox(resolution_panel, values=list(self.CHART_RESOLUTIONS), state="readonly", width=6)
+        self.resolution_field.set(next(iter(self.CHART_RESOLUTIONS)))
+        self.resolution_field.pack(side=tk.LEFT)
+        self.resolution_field.bind("<<ComboboxSelected>>", self.on_resolution_select)
+        self.chart = None
+        self.leaderboard_frame = tk.LabelFrame(right_frame, text="Leaderboard: All", padx=5, pady=5)
+        self.leaderboard_frame.pack(fill=tk.X, pady=(5, 0))
+        self.best_trades_listbox = tk.Listbox(self.leaderboard_frame, height=self.LEADERBOARD_SIZE, font=("Courier", 9))
+        self.worst_trades_listbox = tk.Listbox(self.leaderboard_frame, height=self.LEADERBOARD_SIZE, font=("Courier", 9))
+        self.best_trades_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        self.worst_trades_listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        performance_frame = tk.LabelFrame(right_frame, text="Performance", padx=5, pady=5)
+        performance_frame.pack(fill=tk.X, pady=(5, 0))
+        performance_buttons = tk.Frame(performance_frame)
+        performance_buttons.pack(fill=tk.X)
+        self.instrumentation_enabled = tk.BooleanVar(value=False)
+        tk.Checkbutton(performance_buttons, text="Instrument", variable=self.instrumentation_enabled, command=self.toggle_instrumentation).pack(side=tk.LEFT)
+        self.capture_button = tk.Button(performance_buttons, text="Start Capture", command=self.toggle_capture)
+        self.capture_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(performance_buttons, text="Reset", command=self.reset_performance_stats).pack(side=tk.LEFT, padx=5)
+        tk.Button(performance_buttons, text="Export Stats", command=self.export_performance_stats).pack(side=tk.LEFT, padx=5)
+        self.performance_label = tk.Label(performance_frame, text="Instrumentation off", font=("Courier", 9), justify=tk.LEFT, anchor="w")
+        self.performance_label.pack(fill=tk.X)
+        self.performance_refresh_job = None
         summary_panel = tk.Frame(main_panel)
         summary_panel.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
         self.best_trade_label = tk.Label(summary_panel, text="Best Trade: N/A")
         self.worst_trade_label = tk.Label(summary_panel, text="Worst Trade: N/A")
-        self.wallet_label = tk.Label(summary_panel, text="Wallet: $10000.00")
+        self.wallet_label = tk.Label(summary_panel, text=f"Wallet: ${self.engine.wallet:.2f}")
+        self.equity_label = tk.Label(summary_panel, text="Equity: N/A")
+        self.market_value_label = tk.Label(summary_panel, text="Market Value: N/A")
+        self.cost_basis_label = tk.Label(summary_panel, text="Cost Basis: N/A")
+        self.unrealized_label = tk.Label(summary_panel, text="Unrealized P&L: N/A")
+        self.realized_label = tk.Label(summary_panel, text="Realized P&L: N/A")
         self.best_trade_label.pack(side=tk.LEFT, padx=10)
         self.worst_trade_label.pack(side=tk.LEFT, padx=10)
         self.wallet_label.pack(side=tk.LEFT, padx=10)
-        self.price_update_timer()
+        for valuation_label in (self.equity_label, self.market_value_label, self.cost_basis_label, self.unrealized_label, self.realized_label):
+            valuation_label.pack(side=tk.LEFT, padx=10)
+        self.refresh_table()
         self.update_summary()
         self.update_stock_list()
-
-    def price_update_timer(self):
-        self.update_all_prices()
-        if self.current_symbol:
-            self.plot_stock_history(self.current_symbol)
-        self.after(5000, self.price_update_timer)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.price_worker.start()
+        self.process_worker_results()
+        self.after_idle(self.create_chart)
+
+    def create_chart(self):
+        if self.chart is None:
+            self.chart = CandleChart(self.graph_frame)
+
+    def process_worker_results(self):
+        has_results = False
+        errors = []
+        while True:
+            try:
+                result = self.worker_results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, Exception):
+                errors.append(result)
+            else:
+                self.last_worker_error = None
+            has_results = True
+        if has_results:
+            with self.engine.lock:
+                self.refresh_table()
+                self.update_summary()
+                self.update_stock_list()
+                if self.current_symbol:
+                    self.plot_stock_history(self.current_symbol)
+        for error in errors:
+            if self.feed_ingestor is not None and error is self.feed_ingestor.error:
+                self.disconnect_feed()
+                messagebox.showerror("Feed Error", f"The price feed stopped: {error}")
+            elif str(error) != self.last_worker_error:
+                self.last_worker_error = str(error)
+                messagebox.showerror("Price Update Error", str(error))
+        if self.feed_ingestor is not None and not self.feed_ingestor.is_alive():
+            self.disconnect_feed()
+        self.after(self.RESULT_POLL_MS, self.process_worker_results)
+
+    def toggle_instrumentation(self):
+        if self.instrumentation_enabled.get():
+            self.instrumentation.enable()
+            self.refresh_performance_panel()
+        else:
+            self.instrumentation.disable()
+            if self.performance_refresh_job is not None:
+                self.after_cancel(self.performance_refresh_job)
+                self.performance_refresh_job = None
+            self.capture_button.config(text="Start Capture")
+            self.performance_label.config(text="Instrumentation off")
+
+    def toggle_capture(self):
+        if self.instrumentation.capturing:
+            self.instrumentation.stop_capture()
+            self.capture_button.config(text="Start Capture")
+            return
+        if not self.instrumentation_enabled.get():
+            self.instrumentation_enabled.set(True)
+            self.toggle_instrumentation()
+        self.instrumentation.start_capture()
+        self.capture_button.config(text="Stop Capture")
+
+    def reset_performance_stats(self):
+        self.instrumentation.reset()
+        if self.instrumentation.enabled:
+            self.performance_label.config(text="No samples yet")
+
+    def export_performance_stats(self):
+        path = filedialog.asksaveasfilename(title="Export Performance Stats", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.instrumentation.export(path)
+        except OSError as error:
+            messagebox.showerror("Export Error", str(error))
+
+    def refresh_performance_panel(self):
+        if self.performance_refresh_job is not None:
+            self.after_cancel(self.performance_refresh_job)
+        self.performance_refresh_job = None
+        if not self.instrumentation.enabled:
+            return
+        summary_lines = self.instrumentation.summary_lines()
+        if self.instrumentation.capturing:
+            summary_lines.append("Capturing cProfile and tracemalloc...")
+        self.performance_label.config(text="\n".join(summary_lines) or "No samples yet")
+        self.performance_refresh_job = self.after(self.PERFORMANCE_REFRESH_MS, self.refresh_performance_panel)
+
+    def disconnect_feed(self):
+        self.feed_ingestor.stop()
+        self.feed_ingestor = None
+        self.feed_button.config(text="Connect Feed")
+        self.price_worker.resume()
+
+    def toggle_feed(self):
+        if self.feed_ingestor is not None:
+            self.disconnect_feed()
+            return
+        feed_address = simpledialog.askstring("Connect Feed", "Enter host:port of a tick feed, or the path of a replay CSV:",
+                                              initialvalue=f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+        if feed_address is None or not feed_address.strip():
+            return
+        feed_address = feed_address.strip()
+        if os.path.isfile(feed_address):
+            source = ReplayFileSource(feed_address)
+        else:
+            host, _, port = feed_address.rpartition(":")
+            try:
+                source = SocketSource(host or DEFAULT_HOST, int(port))
+            except ValueError:
+                messagebox.showerror("Feed Error", f"Not a replay file or host:port: {feed_address}")
+                return
+        self.price_worker.pause()
+        self.feed_ingestor = FeedIngestor(self.engine, source, self.worker_results)
+        self.feed_ingestor.start()
+        self.feed_button.config(text="Disconnect Feed")
+
+    def on_close(self):
+        if self.feed_ingestor is not None:
+            self.feed_ingestor.stop()
+            self.feed_ingestor.join(1.0)
+        self.price_worker.stop()
+        self.instrumentation.disable()
+        with self.engine.lock:
+            self.engine.close()
+        self.destroy()
 
     def add_trade(self):
         symbol = self.symbol_field.get().strip()
@@ -267,33 +454,27 @@ class TradingTracker(tk.Tk):
         except ValueError:
             messagebox.showerror("Input Error", "Price must be a number and volume must be an integer.")
             return
-        trade_timestamp = time.time()
-        new_trade = Trade(trade_timestamp, symbol, price, volume, price, "Buy")
-        self.transaction_tracker.add_trade(new_trade)
-        self.portfolio_manager.add_trade(new_trade)
-        self.all_trades.append(new_trade)
-        cost_of_purchase = price * volume
-        self.wallet -= cost_of_purchase
-        self.update_stock_history(symbol, price, trade_timestamp)
+        with self.engine.lock:
+            try:
+                self.engine.add_trade(symbol, price, volume)
+            except ValueError as error:
+                messagebox.showerror("Input Error", str(error))
+                return
+            self.refresh_table()
+            self.update_summary()
+            self.update_stock_list()
         self.symbol_field.delete(0, tk.END)
-        self.refresh_table()
-        self.update_summary()
-        self.update_stock_list()
 
     def sell_trade(self):
         symbol = simpledialog.askstring("Sell Stock", "Enter the stock symbol to sell:")
         if symbol is None or not symbol.strip():
             return
         symbol = symbol.strip()
-        buy_trade = None
-        for trade in self.all_trades:
-            if trade.symbol.lower() == symbol.lower() and trade.trade_type == "Buy" and trade.volume > 0:
-                buy_trade = trade
-                break
-        if buy_trade is None:
+        available_volume = self.engine.open_volume(symbol)
+        if available_volume == 0:
             messagebox.showerror("Sell Error", f"No available buy trade found for symbol: {symbol}")
             return
-        volume_string = simpledialog.askstring("Sell Stock", f"Enter number of shares to sell (Available: {buy_trade.volume}):")
+        volume_string = simpledialog.askstring("Sell Stock", f"Enter number of shares to sell (Available: {available_volume}):")
         if volume_string is None or not volume_string.strip():
             return
         try:
@@ -301,75 +482,66 @@ class TradingTracker(tk.Tk):
         except ValueError:
             messagebox.showerror("Input Error", "Volume must be an integer.")
             return
-        if sell_volume <= 0 or sell_volume > buy_trade.volume:
-            messagebox.showerror("Sell Error", f"Invalid sell volume. Must be between 1 and {buy_trade.volume}")
-            return
-        current_price = buy_trade.price
-        trade_timestamp = time.time()
-        sell_trade = Trade(trade_timestamp, symbol, current_price, sell_volume, buy_trade.original_price, "Sell")
-        self.transaction_tracker.add_trade(sell_trade)
-        self.portfolio_manager.add_trade(sell_trade)
-        self.all_trades.append(sell_trade)
-        buy_trade.reduce_volume(sell_volume)
-        revenue = current_price * sell_volume
-        self.wallet += revenue
-        self.update_stock_history(symbol, current_price, trade_timestamp)
-        self.refresh_table()
-        self.update_summary()
-        self.update_stock_list()
-
-    def simulate_price_update(self, trade, max_fluctuation):
-        fluctuation_factor = 1 + (self.random_generator.random() * 2 * max_fluctuation - max_fluctuation)
-        return trade.price * fluctuation_factor
+        with self.engine.lock:
+            try:
+                self.engine.sell_trade(symbol, sell_volume)
+            except ValueError as error:
+                messagebox.showerror("Sell Error", str(error))
+                return
+            self.refresh_table()
+            self.update_summary()
+            self.update_stock_list()
 
     def update_all_prices(self):
-        for trade in self.all_trades:
-            if trade.trade_type == "Buy" and trade.volume > 0:
-                new_price = self.simulate_price_update(trade, 0.05)
-                trade.price = new_price
-        self.transaction_tracker = TransactionTracker()
-        self.portfolio_manager = PortfolioManager()
-        latest_prices = {}
-        for trade in self.all_trades:
-            self.transaction_tracker.add_trade(trade)
-            self.portfolio_manager.add_trade(trade)
-            if trade.trade_type == "Buy" and trade.volume > 0:
-                latest_prices[trade.symbol] = trade.price
-        current_time = time.time()
-        for symbol, price in latest_prices.items():
-            self.update_stock_history(symbol, price, current_time)
-        self.refresh_table()
-        self.update_summary()
-        self.update_stock_list()
+        self.price_worker.trigger()
 
     def update_selected_stock(self):
         selected_items = self.trade_table.selection()
         if not selected_items:
             messagebox.showwarning("No Selection", "Please select a trade to update.")
             return
-        selected_item = selected_items[0]
-        table_children = self.trade_table.get_children()
-        selected_index = table_children.index(selected_item)
-        selected_trade = self.all_trades[selected_index]
-        if selected_trade.trade_type != "Buy" or selected_trade.volume <= 0:
-            messagebox.showerror("Update Error", "Selected trade is not an active buy trade.")
+        selected_trade = self.trade_table_view.trade_for_iid(selected_items[0])
+        if selected_trade is None:
+            messagebox.showwarning("No Selection", "Please select a trade to update.")
+            return
+        with self.engine.lock:
+            try:
+                self.engine.update_trade_price(selected_trade)
+            except ValueError as error:
+                messagebox.showerror("Update Error", str(error))
+                return
+            self.refresh_table()
+            self.update_summary()
+            self.update_stock_list()
+
+    def import_trades(self):
+        path = filedialog.askopenfilename(title="Import Trades", filetypes=[("Trade files", "*.csv *.parquet"), ("All files", "*.*")])
+        if not path:
             return
-        new_price = self.simulate_price_update(selected_trade, 0.05)
-        selected_trade.price = new_price
-        current_time = time.time()
-        self.update_stock_history(selected_trade.symbol, new_price, current_time)
-        self.transaction_tracker = TransactionTracker()
-        self.portfolio_manager = PortfolioManager()
-        for trade in self.all_trades:
-            self.transaction_tracker.add_trade(trade)
-            self.portfolio_manager.add_trade(trade)
-        self.refresh_table()
-        self.update_summary()
-        self.update_stock_list()
+        try:
+            imported_count = import_trades(self.engine, path)
+        except (OSError, ValueError, ImportError) as error:
+            messagebox.showerror("Import Error", str(error))
+            imported_count = None
+        with self.engine.lock:
+            self.refresh_table()
+            self.update_summary()
+            self.update_stock_list()
+        if imported_count is not None:
+            messagebox.showinfo("Import Trades", f"Imported {imported_count} trades.")
+
+    def export_trades(self):
+        path = filedialog.asksaveasfilename(title="Export Trades", defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet")])
+        if not path:
+            return
+        try:
+            export_trades(self.engine, path)
+        except (OSError, ImportError) as error:
+            messagebox.showerror("Export Error", str(error))
 
     def update_summary(self):
-        best_trade = self.transaction_tracker.get_best_trade()
-        worst_trade = self.transaction_tracker.get_worst_trade()
+        best_trade = self.engine.best_trade()
+        worst_trade = self.engine.worst_trade()
         if best_trade:
             self.best_trade_label.config(text=f"Best Trade: {best_trade.symbol} | Profit: {best_trade.performance_metric():.2f}")
         else:
@@ -378,54 +550,28 @@ class TradingTracker(tk.Tk):
             self.worst_trade_label.config(text=f"Worst Trade: {worst_trade.symbol} | Profit: {worst_trade.performance_metric():.2f}")
         else:
             self.worst_trade_label.config(text="Worst Trade: N/A")
-        self.wallet_label.config(text=f"Wallet: ${self.wallet:.2f}")
+        valuation = self.engine.portfolio_valuation()
+        self.wallet_label.config(text=f"Wallet: ${valuation['wallet']:.2f}")
+        self.equity_label.config(text=f"Equity: ${valuation['equity']:.2f}")
+        self.market_value_label.config(text=f"Market Value: ${valuation['market_value']:.2f}")
+        self.cost_basis_label.config(text=f"Cost Basis: ${valuation['cost_basis']:.2f}")
+        self.unrealized_label.config(text=f"Unrealized P&L: {valuation['unrealized_pnl']:+.2f}")
+        self.realized_label.config(text=f"Realized P&L: {valuation['realized_pnl']:+.2f}")
+        self.update_leaderboard()
+
+    def update_leaderboard(self):
+        self.leaderboard_frame.config(text=f"Leaderboard: {self.current_symbol or 'All'}")
+        for listbox, worst in ((self.best_trades_listbox, False), (self.worst_trades_listbox, True)):
+            listbox.delete(0, tk.END)
+            for trade in self.engine.top_trades(self.LEADERBOARD_SIZE, self.current_symbol, worst):
+                listbox.insert(tk.END, f"{trade.symbol:<8}{trade.volume:>7} @ {trade.original_price:>9.2f} {trade.performance_metric():>+12.2f}")
 
     def refresh_table(self):
-        for row in self.trade_table.get_children():
-            self.trade_table.delete(row)
-        for trade in self.all_trades:
-            self.trade_table.insert("", "end", values=(
-                f"{trade.timestamp:.2f}",
-                trade.symbol,
-                trade.trade_type,
-                f"{trade.price:.2f}",
-                trade.volume,
-                f"{trade.original_price:.2f}",
-                f"{trade.performance_metric():.2f}"
-            ))
-
-    def update_stock_history(self, symbol, new_price, timestamp):
-        period = self.CANDLE_PERIOD
-        if symbol not in self.stock_history:
-            self.stock_history[symbol] = [{
-                "start": timestamp,
-                "open": new_price,
-                "high": new_price,
-                "low": new_price,
-                "close": new_price
-            }]
-        else:
-            candles = self.stock_history[symbol]
-            latest_candle = candles[-1]
-            if timestamp < latest_candle["start"] + period:
-                latest_candle["high"] = max(latest_candle["high"], new_price)
-                latest_candle["low"] = min(latest_candle["low"], new_price)
-                latest_candle["close"] = new_price
-            else:
-                candles.append({
-                    "start": timestamp,
-                    "open": new_price,
-                    "high": new_price,
-                    "low": new_price,
-                    "close": new_price
-                })
-        if len(self.stock_history[symbol]) > 50:
-            self.stock_history[symbol] = self.stock_history[symbol][-50:]
+        self.trade_table_view.refresh()
 
     def update_stock_list(self):
-        unique_symbols = sorted({trade.symbol for trade in self.all_trades})
         self.stock_listbox.delete(0, tk.END)
-        for symbol in unique_symbols:
+        for symbol in self.engine.symbols():
             self.stock_listbox.insert(tk.END, symbol)
 
     def on_stock_select(self, event):
@@ -434,30 +580,28 @@ class TradingTracker(tk.Tk):
             selected_index = selected_indices[0]
             symbol = event.widget.get(selected_index)
             self.current_symbol = symbol
-            self.plot_stock_history(symbol)
-            if symbol in self.stock_history and self.stock_history[symbol]:
-                latest_price = self.stock_history[symbol][-1]["close"]
-                self.selected_stock_label.config(text=f"Selected Stock: {symbol} | Price: {latest_price:.2f}")
-            else:
-                self.selected_stock_label.config(text=f"Selected Stock: {symbol} | Price: N/A")
+            with self.engine.lock:
+                self.plot_stock_history(symbol)
+                self.update_leaderboard()
+                latest_price = self.engine.latest_price(symbol)
+                if latest_price is not None:
+                    position = self.engine.position(symbol)
+                    self.selected_stock_label.config(text=f"Selected Stock: {symbol} | Price: {latest_price:.2f} | "
+                                                          f"Position: {position['open_volume']} @ {position['average_cost']:.2f} | "
+                                                          f"Unrealized: {position['unrealized_pnl']:+.2f}")
+                else:
+                    self.selected_stock_label.config(text=f"Selected Stock: {symbol} | Price: N/A")
+
+    def on_resolution_select(self, event):
+        if self.current_symbol:
+            with self.engine.lock:
+                self.plot_stock_history(self.current_symbol)
 
     def plot_stock_history(self, symbol):
-        self.ax.clear()
-        self.ax.set_title(f"{symbol} Price vs Time")
-        self.ax.set_xlabel("Time")
-        self.ax.set_ylabel("Price")
-        if symbol not in self.stock_history or len(self.stock_history[symbol]) == 0:
-            self.canvas.draw()
-            return
-        times = []
-        prices = []
-        for candle in self.stock_history[symbol]:
-            time_point = datetime.fromtimestamp(candle["start"])
-            times.append(time_point)
-            prices.append(candle["close"])
-        self.ax.plot(times, prices, marker='o', linestyle='-')
-        self.figure.autofmt_xdate()
-        self.canvas.draw()
+        self.create_chart()
+        resolution = self.CHART_RESOLUTIONS[self.resolution_field.get()]
+        candles = self.engine.candle_history(symbol, resolution=resolution, limit=self.CHART_CANDLES)
+        self.chart.show(symbol, candles, resolution)
 
 if __name__ == "__main__":
     app = TradingTracker()
@@ -0,0 +1,294 @@
+import json
+import os
+
+import numpy as np
+
+from engine import Trade, TradeStore
+
+TRADE_RECORD = np.dtype([
+    ("trade_id", "<i8"),
+    ("timestamp", "<f8"),
+    ("price", "<f8"),
+    ("volume", "<i8"),
+    ("original_price", "<f8"),
+    ("original_volume", "<i8"),
+    ("symbol_id", "<i4"),
+    ("trade_type", "i1"),
+])
+
+CANDLE_RECORD = np.dtype([
+    ("symbol_id", "<i4"),
+    ("start", "<f8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+])
+
+
+class MappedTable:
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = dtype
+        self.records = np.empty(0, dtype=dtype)
+        self.remap()
+
+    def __len__(self):
+        return len(self.records)
+
+    def remap(self):
+        record_count = os.path.getsize(self.path) // self.dtype.itemsize if os.path.exists(self.path) else 0
+        if record_count:
+            self.records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(record_count,))
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+
+    def update(self, indices, field, values):
+        records = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(len(self.records),))
+        records[field][indices] = values
+        records.flush()
+        del records
+        self.remap()
+
+    def append(self, records):
+        if len(records) == 0:
+            return
+        with open(self.path, "ab") as table_file:
+            table_file.truncate(len(self.records) * self.dtype.itemsize)
+            table_file.write(records.tobytes())
+            table_file.flush()
+            os.fsync(table_file.fileno())
+        self.remap()
+
+
+class TradeArchive:
+    TRADES_FILE = "trades.archive"
+    CANDLES_FILE = "candles.archive"
+    SYMBOLS_FILE = "symbols.archive.json"
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.trade_table = MappedTable(os.path.join(directory, self.TRADES_FILE), TRADE_RECORD)
+        self.candle_table = MappedTable(os.path.join(directory, self.CANDLES_FILE), CANDLE_RECORD)
+        self.symbols_path = os.path.join(directory, self.SYMBOLS_FILE)
+        self.symbols = []
+        if os.path.exists(self.symbols_path):
+            with open(self.symbols_path) as symbols_file:
+                self.symbols = json.load(symbols_file)
+        self.symbol_ids_by_name = {symbol: symbol_id for symbol_id, symbol in enumerate(self.symbols)}
+        self.first_trade_id = int(self.trade_table.records["trade_id"][0]) if len(self.trade_table) else 0
+        self.cumulative_totals = np.zeros((1, 4))
+        self.index_trade_times()
+        self.index_candle_runs()
+
+    def __len__(self):
+        return len(self.trade_table)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError("Archived trade index out of range")
+        return Trade(self, self.first_trade_id + index)
+
+    def __iter__(self):
+        first_trade_id = self.first_trade_id
+        for index in range(len(self)):
+            yield Trade(self, first_trade_id + index)
+
+    def row_index(self, trade_id):
+        index = trade_id - self.first_trade_id
+        if not 0 <= index < len(self):
+            raise KeyError(f"Unknown trade id: {trade_id}")
+        return index
+
+    @property
+    def trade_ids(self):
+        return self.trade_table.records["trade_id"]
+
+    @property
+    def timestamps(self):
+        return self.trade_table.records["timestamp"]
+
+    @property
+    def prices(self):
+        return self.trade_table.records["price"]
+
+    @property
+    def volumes(self):
+        return self.trade_table.records["volume"]
+
+    @property
+    def original_prices(self):
+        return self.trade_table.records["original_price"]
+
+    @property
+    def original_volumes(self):
+        return self.trade_table.records["original_volume"]
+
+    @property
+    def symbol_ids(self):
+        return self.trade_table.records["symbol_id"]
+
+    @property
+    def trade_types(self):
+        return self.trade_table.records["trade_type"]
+
+    def sync_symbols(self, symbols):
+        if len(symbols) == len(self.symbols):
+            return
+        self.symbols = list(symbols)
+        self.symbol_ids_by_name = {symbol: symbol_id for symbol_id, symbol in enumerate(self.symbols)}
+        temporary_path = self.symbols_path + ".tmp"
+        with open(temporary_path, "w") as symbols_file:
+            json.dump(self.symbols, symbols_file)
+        os.replace(temporary_path, self.symbols_path)
+
+    @property
+    def next_trade_id(self):
+        return self.first_trade_id + len(self)
+
+    def archive_trades(self, store, count):
+        first_index = max(self.next_trade_id - store.first_trade_id, 0) if len(self) else 0
+        if first_index >= count:
+            return
+        rows = slice(store.carried_count + first_index, store.carried_count + count)
+        records = np.empty(count - first_index, dtype=TRADE_RECORD)
+        records["trade_id"] = np.arange(store.first_trade_id + first_index, store.first_trade_id + count)
+        records["timestamp"] = store.timestamps[rows]
+        records["price"] = store.current_prices()[rows]
+        records["volume"] = np.where(store.open_buy_mask()[rows], 0, store.volumes[rows])
+        records["original_price"] = store.original_prices[rows]
+        records["original_volume"] = store.original_volumes[rows]
+        records["symbol_id"] = store.symbol_ids[rows]
+        records["trade_type"] = store.trade_types[rows]
+        if not len(self):
+            self.first_trade_id = store.first_trade_id
+        self.sync_symbols(store.symbols)
+        in_order = len(self) == 0 or (self.time_order is None and records["timestamp"][0] >= self.latest_timestamp)
+        self.trade_table.append(records)
+        if not (in_order and np.all(records["timestamp"][1:] >= records["timestamp"][:-1])):
+            self.index_trade_times()
+
+    def settle_trades(self, store, carried_indices):
+        if len(carried_indices):
+            self.trade_table.update(store.carried_trade_ids[carried_indices] - self.first_trade_id, "price", store.prices[carried_indices])
+
+    def index_trade_times(self):
+        timestamps = self.timestamps
+        if np.all(timestamps[1:] >= timestamps[:-1]):
+            self.time_order = None
+            self.sorted_timestamps = None
+        else:
+            self.time_order = np.argsort(timestamps, kind="stable")
+            self.sorted_timestamps = timestamps[self.time_order]
+
+    @property
+    def timestamps_in_order(self):
+        return self.timestamps if self.time_order is None else self.sorted_timestamps
+
+    @property
+    def latest_timestamp(self):
+        return self.timestamps_in_order[-1].item()
+
+    def rows_in_order(self, first_index, last_index):
+        if self.time_order is None:
+            return range(first_index, last_index)
+        return self.time_order[first_index:last_index].tolist()
+
+    def index_candle_runs(self):
+        self.candle_runs = {}
+        records = self.candle_table.records
+        if not len(records):
+            return
+        symbol_ids = records["symbol_id"]
+        starts = records["start"]
+        boundaries = np.flatnonzero(np.diff(symbol_ids)) + 1
+        run_offsets = np.concatenate(([0], boundaries)).tolist()
+        run_stops = np.concatenate((boundaries, [len(records)])).tolist()
+        for offset, stop in zip(run_offsets, run_stops):
+            self.add_candle_run(symbol_ids[offset].item(), offset, stop - offset, starts[offset].item(), starts[stop - 1].item())
+
+    def add_candle_run(self, symbol_id, offset, count, first_start, last_start):
+        runs = self.candle_runs.setdefault(symbol_id, [])
+        if runs and runs[-1][0] + runs[-1][1] == offset:
+            runs[-1][1] += count
+            runs[-1][3] = last_start
+        else:
+            runs.append([offset, count, first_start, last_start])
+
+    def archive_candles(self, symbols, symbol, candles):
+        if not len(candles):
+            return
+        self.sync_symbols(symbols)
+        records = np.empty(len(candles), dtype=CANDLE_RECORD)
+        records["symbol_id"] = self.symbol_ids_by_name[symbol]
+        for position, field in enumerate(("start", "open", "high", "low", "close")):
+            records[field] = candles[:, position]
+        offset = len(self.candle_table)
+        self.candle_table.append(records)
+        self.add_candle_run(records["symbol_id"][0].item(), offset, len(records), records["start"][0].item(), records["start"][-1].item())
+
+    def index_range(self, start_time=None, end_time=None):
+        timestamps = self.timestamps_in_order
+        first_index = 0 if start_time is None else int(np.searchsorted(timestamps, start_time, side="left"))
+        last_index = len(timestamps) if end_time is None else int(np.searchsorted(timestamps, end_time, side="right"))
+        return first_index, max(first_index, last_index)
+
+    def trade_range(self, start_time=None, end_time=None):
+        first_index, last_index = self.index_range(start_time, end_time)
+        if self.time_order is None:
+            return self.trade_table.records[first_index:last_index]
+        return self.trade_table.records[self.time_order[first_index:last_index]]
+
+    def iterate(self, start_time=None, end_time=None):
+        first_index, last_index = self.index_range(start_time, end_time)
+        first_trade_id = self.first_trade_id
+        for index in self.rows_in_order(first_index, last_index):
+            yield Trade(self, first_trade_id + index)
+
+    def trades_between(self, start_time, end_time):
+        return list(self.iterate(start_time, end_time))
+
+    def prefix_totals(self):
+        if len(self.cumulative_totals) != len(self) + 1:
+            records = self.trade_table.records
+            is_sell = records["trade_type"] == TradeStore.TRADE_TYPES.index("Sell")
+            volumes = records["original_volume"].astype(np.float64)
+            totals = np.empty((len(records), 4))
+            totals[:, 0] = 1.0
+            totals[:, 1] = volumes
+            totals[:, 2] = np.where(is_sell, records["price"], records["original_price"]) * volumes
+            totals[:, 3] = np.where(is_sell, (records["price"] - records["original_price"]) * volumes, 0.0)
+            if self.time_order is not None:
+                totals = totals[self.time_order]
+            self.cumulative_totals = np.vstack((np.zeros((1, 4)), np.cumsum(totals, axis=0)))
+        return self.cumulative_totals
+
+    def totals_between(self, start_time, end_time):
+        first_index, last_index = self.index_range(start_time, end_time)
+        cumulative_totals = self.prefix_totals()
+        return cumulative_totals[last_index] - cumulative_totals[first_index]
+
+    def floor(self, timestamp):
+        index = int(np.searchsorted(self.timestamps_in_order, timestamp, side="right")) - 1
+        return Trade(self, self.first_trade_id + self.rows_in_order(index, index + 1)[0]) if index >= 0 else None
+
+    def ceiling(self, timestamp):
+        index = int(np.searchsorted(self.timestamps_in_order, timestamp, side="left"))
+        return Trade(self, self.first_trade_id + self.rows_in_order(index, index + 1)[0]) if index < len(self) else None
+
+    def candle_range(self, symbol, start_time=None, end_time=None):
+        symbol_id = self.symbol_ids_by_name.get(symbol)
+        records = self.candle_table.records
+        if symbol_id is None:
+            return records[:0]
+        run_records = []
+        for offset, count, first_start, last_start in self.candle_runs.get(symbol_id, ()):
+            if (start_time is not None and last_start < start_time) or (end_time is not None and first_start > end_time):
+                continue
+            run = records[offset:offset + count]
+            first_index = 0 if start_time is None else int(np.searchsorted(run["start"], start_time, side="left"))
+            last_index = count if end_time is None else int(np.searchsorted(run["start"], end_time, side="right"))
+            run_records.append(run[first_index:last_index])
+        if not run_records:
+            return records[:0]
+        return run_records[0] if len(run_records) == 1 else np.concatenate(run_records)
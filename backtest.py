@@ -0,0 +1,181 @@
+import argparse
+import csv
+import hashlib
+import json
+import random
+
+import numpy as np
+
+from candles import CANDLE_FIELDS
+from engine import PriceSimulator, TradingEngine
+from journal import TradeJournal, replay_record
+
+EVENT_FIELDS = ("timestamp", "event", "symbol", "price", "volume")
+EVENT_TYPES = ("buy", "sell", "price", "tick")
+
+
+class SimulatedClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, timestamp):
+        if timestamp > self.now:
+            self.now = timestamp
+
+
+def read_events(path):
+    with open(path, newline="") as events_file:
+        for row in csv.DictReader(events_file):
+            yield (float(row["timestamp"]), row["event"].strip().lower(), row.get("symbol") or None,
+                   float(row["price"]) if row.get("price") else None, int(row["volume"]) if row.get("volume") else None)
+
+
+def write_events(events, path):
+    with open(path, "w", newline="") as events_file:
+        writer = csv.writer(events_file)
+        writer.writerow(EVENT_FIELDS)
+        for timestamp, event_type, symbol, price, volume in events:
+            writer.writerow((repr(timestamp), event_type, symbol or "", "" if price is None else repr(price), "" if volume is None else volume))
+
+
+def synthetic_events(count, symbols, seed=None, start_time=0.0):
+    random_generator = random.Random(seed)
+    prices = {symbol: random_generator.uniform(10, 500) for symbol in symbols}
+    timestamp = start_time
+    for _ in range(count):
+        timestamp += random_generator.expovariate(1.0)
+        symbol = random_generator.choice(symbols)
+        roll = random_generator.random()
+        if roll < 0.6:
+            prices[symbol] *= 1 + random_generator.uniform(-0.01, 0.01)
+            yield timestamp, "price", symbol, prices[symbol], None
+        elif roll < 0.85:
+            yield timestamp, "buy", symbol, prices[symbol], random_generator.randint(1, 100)
+        elif roll < 0.95:
+            yield timestamp, "sell", symbol, prices[symbol], random_generator.randint(1, 100)
+        else:
+            yield timestamp, "tick", None, None, None
+
+
+class Backtest:
+    def __init__(self, seed=None, max_fluctuation=0.05, lot_policy="fifo", wallet=TradingEngine.STARTING_WALLET, start_time=0.0):
+        self.clock = SimulatedClock(start_time)
+        self.engine = TradingEngine(wallet=wallet, price_simulator=PriceSimulator(max_fluctuation, seed), lot_policy=lot_policy, clock=self.clock)
+        self.event_count = 0
+        self.tick_count = 0
+        self.rejected_count = 0
+
+    def apply_event(self, timestamp, event_type, symbol=None, price=None, volume=None):
+        engine = self.engine
+        self.clock.advance_to(timestamp)
+        self.event_count += 1
+        if event_type == "buy":
+            if volume <= 0 or not price > 0:
+                self.rejected_count += 1
+                return
+            engine.add_trade(symbol, price, volume, timestamp)
+        elif event_type == "sell":
+            if volume <= 0 or volume > engine.open_volume(symbol):
+                self.rejected_count += 1
+                return
+            if price is not None:
+                engine.set_sell_price(symbol, price, timestamp)
+            engine.sell_trade(symbol, volume, timestamp)
+        elif event_type == "price":
+            engine.all_trades.set_market_price(symbol, price)
+            engine.prices_updated(np.array([engine.all_trades.symbol_id(symbol)], dtype=np.int32), timestamp)
+        elif event_type == "tick":
+            self.tick_count += 1
+            engine.update_all_prices(timestamp)
+        else:
+            raise ValueError(f"Unknown event type: {event_type}")
+
+    def run(self, events):
+        for event in events:
+            self.apply_event(*event)
+        return self.report()
+
+    def run_journal(self, path):
+        for record_type, payload, _ in TradeJournal.read_records(path):
+            self.event_count += 1
+            replay_record(self.engine, record_type, payload)
+        return self.report()
+
+    def digest(self):
+        engine = self.engine
+        store = engine.all_trades
+        state_hash = hashlib.sha256()
+        for column_name, _ in store.COLUMNS:
+            state_hash.update(store.column(column_name).tobytes())
+        state_hash.update(store.price_book.column().tobytes())
+        state_hash.update("\n".join(store.symbols).encode("utf-8"))
+        state_hash.update(repr(engine.wallet).encode("utf-8"))
+        for candle_array in engine.candles.state(store.symbol_ids_by_name).values():
+            state_hash.update(candle_array.tobytes())
+        return state_hash.hexdigest()
+
+    def report(self):
+        engine = self.engine
+        store = engine.all_trades
+        best_trade = engine.best_trade()
+        worst_trade = engine.worst_trade()
+        valuation = engine.portfolio_valuation()
+        candles = {}
+        for symbol in engine.symbols():
+            symbol_candles = {}
+            for resolution in engine.CANDLE_RESOLUTIONS:
+                history = engine.candle_history(symbol, resolution=resolution)
+                if len(history["start"]):
+                    symbol_candles[str(resolution)] = {"count": len(history["start"]),
+                                                       "last": {field: history[field][-1].item() for field in CANDLE_FIELDS}}
+            candles[symbol] = symbol_candles
+        return {
+            "events": self.event_count,
+            "ticks": self.tick_count,
+            "rejected": self.rejected_count,
+            "trades": len(store),
+            "wallet": engine.wallet,
+            "realized_pnl": valuation["realized_pnl"],
+            "unrealized_pnl": valuation["unrealized_pnl"],
+            "market_value": valuation["market_value"],
+            "equity": valuation["equity"],
+            "best_trade": str(best_trade) if best_trade is not None else None,
+            "worst_trade": str(worst_trade) if worst_trade is not None else None,
+            "open_positions": {symbol: engine.open_volume(symbol) for symbol in engine.symbols() if engine.open_volume(symbol)},
+            "candles": candles,
+            "digest": self.digest(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded event stream through the trading engine.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--events", help="CSV of timestamp,event,symbol,price,volume")
+    source.add_argument("--journal", help="trade journal written by the tracker")
+    source.add_argument("--synthetic", type=int, metavar="COUNT", help="generate COUNT seeded synthetic events")
+    parser.add_argument("--symbols", type=int, default=20, help="symbol count for synthetic events")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--volatility", type=float, default=0.05)
+    parser.add_argument("--lot-policy", default="fifo")
+    parser.add_argument("--output", help="write the JSON report here instead of printing it")
+    arguments = parser.parse_args()
+    backtest = Backtest(arguments.seed, arguments.volatility, arguments.lot_policy)
+    if arguments.journal:
+        report = backtest.run_journal(arguments.journal)
+    elif arguments.events:
+        report = backtest.run(read_events(arguments.events))
+    else:
+        symbols = [f"SYM{index}" for index in range(arguments.symbols)]
+        report = backtest.run(synthetic_events(arguments.synthetic, symbols, arguments.seed))
+    if arguments.output:
+        with open(arguments.output, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+    else:
+        print(json.dumps({key: value for key, value in report.items() if key != "candles"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from DSAh import DynamicArray
+from engine import Heap, PortfolioManager, PriceSimulator, TradeStore, TradingEngine, TransactionTracker
+from journal import recover, save_snapshot, SNAPSHOT_FILE
+
+SIZES = (10_000, 100_000, 1_000_000)
+SYMBOL_COUNT = 500
+TICK_COUNT = 200
+SAMPLE_COUNT = 1000
+QUERY_COUNT = 1000
+PERCENTILES = (50, 95, 99)
+LEADERBOARD_SIZE = 5
+
+
+class ComparatorHeap:
+    def __init__(self, comparator):
+        self.data = []
+        self.positions = {}
+        self.comparator = comparator
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def push(self, item):
+        self.data.append(item)
+        self.positions[item] = len(self.data) - 1
+        self._sift_up(len(self.data) - 1)
+
+    def pop(self):
+        if not self.data:
+            return None
+        top_item = self.data[0]
+        self.remove(top_item)
+        return top_item
+
+    def peek(self):
+        if not self.data:
+            return None
+        return self.data[0]
+
+    def update(self, item):
+        index = self.positions.get(item)
+        if index is None:
+            return
+        self._sift_up(index)
+        self._sift_down(self.positions[item])
+
+    def remove(self, item):
+        index = self.positions.pop(item, None)
+        if index is None:
+            return
+        last_item = self.data.pop()
+        if index < len(self.data):
+            self.data[index] = last_item
+            self.positions[last_item] = index
+            self._sift_up(index)
+            self._sift_down(self.positions[last_item])
+
+    def _swap(self, first_index, second_index):
+        first_item = self.data[first_index]
+        second_item = self.data[second_index]
+        self.data[first_index] = second_item
+        self.data[second_index] = first_item
+        self.positions[second_item] = first_index
+        self.positions[first_item] = second_index
+
+    def _sift_up(self, index):
+        parent_index = (index - 1) // 2
+        while index > 0 and self.comparator(self.data[index], self.data[parent_index]):
+            self._swap(index, parent_index)
+            index = parent_index
+            parent_index = (index - 1) // 2
+
+    def _sift_down(self, index):
+        total_items = len(self.data)
+        while True:
+            left_index = 2 * index + 1
+            right_index = 2 * index + 2
+            best_index = index
+            if left_index < total_items and self.comparator(self.data[left_index], self.data[best_index]):
+                best_index = left_index
+            if right_index < total_items and self.comparator(self.data[right_index], self.data[best_index]):
+                best_index = right_index
+            if best_index == index:
+                break
+            self._swap(index, best_index)
+            index = best_index
+
+
+def generate_trades(count, seed=42):
+    random_generator = random.Random(seed)
+    trades = TradeStore()
+    for index in range(count):
+        original_price = random_generator.uniform(10, 500)
+        price = original_price * random_generator.uniform(0.8, 1.2)
+        trades.append(float(index), f"SYM{index}", price,
+                      random_generator.randint(1, 1000), original_price, "Buy")
+    return list(trades)
+
+
+def timed(function, *arguments):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function(*arguments)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def bench_comparator_heap(trades, new_prices):
+    heap = ComparatorHeap(lambda first_trade, second_trade: first_trade.performance_metric() > second_trade.performance_metric())
+
+    def push_all():
+        for trade in trades:
+            heap.push(trade)
+
+    def reprice_all():
+        for trade, new_price in zip(trades, new_prices):
+            trade.price = new_price
+            heap.update(trade)
+
+    def pop_all():
+        while heap.pop() is not None:
+            pass
+
+    return timed(push_all), timed(reprice_all), timed(pop_all)
+
+
+def bench_cached_key_heap(trades, new_prices):
+    heap = Heap(mode="max")
+
+    def push_all():
+        for trade in trades:
+            heap.push(trade, trade.performance_metric())
+
+    def reprice_all():
+        for trade, new_price in zip(trades, new_prices):
+            trade.price = new_price
+            heap.update(trade, trade.performance_metric())
+
+    def pop_all():
+        while heap.pop() is not None:
+            pass
+
+    return timed(push_all), timed(reprice_all), timed(pop_all)
+
+
+def generate_columns(count, symbol_count=SYMBOL_COUNT, seed=42):
+    random_generator = np.random.default_rng(seed)
+    market_prices = random_generator.uniform(10, 500, symbol_count)
+    symbol_ids = random_generator.integers(0, symbol_count, count).astype(np.int32)
+    trade_types = (random_generator.random(count) < 0.1).astype(np.int8)
+    original_prices = market_prices[symbol_ids] * random_generator.uniform(0.9, 1.1, count)
+    volumes = random_generator.integers(1, 1000, count)
+    columns = {
+        "timestamps": 1.7e9 + np.cumsum(random_generator.exponential(1.0, count)),
+        "prices": np.where(trade_types == 1, original_prices * random_generator.uniform(0.8, 1.2, count), original_prices),
+        "volumes": volumes,
+        "original_prices": original_prices,
+        "original_volumes": volumes,
+        "symbol_ids": symbol_ids,
+        "trade_types": trade_types,
+    }
+    return columns, [f"SYM{symbol_id}" for symbol_id in range(symbol_count)], market_prices
+
+
+def build_engine(columns, symbols, market_prices, seed=42):
+    engine = TradingEngine(price_simulator=PriceSimulator(seed=seed))
+    engine.all_trades.load_columns(columns, symbols, market_prices)
+    engine.rebuild_indexes()
+    return engine
+
+
+def rate(count, seconds):
+    return count / seconds if seconds else float("inf")
+
+
+def latency_summary(samples):
+    milliseconds = np.asarray(samples) * 1000.0
+    summary = {f"p{percentile}_ms": float(np.percentile(milliseconds, percentile)) for percentile in PERCENTILES}
+    summary["max_ms"] = float(milliseconds.max())
+    return summary
+
+
+def sample_latencies(function, arguments):
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for argument in arguments:
+            start = time.perf_counter()
+            function(*argument)
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return latency_summary(samples)
+
+
+def bench_containers(count, seed):
+    random_generator = random.Random(seed)
+    keys = [random_generator.uniform(-1000, 1000) for _ in range(count)]
+    results = {}
+
+    def append_dynamic_array():
+        array = DynamicArray()
+        for index in range(count):
+            array.append(index)
+
+    store = TradeStore()
+
+    def append_trade_store():
+        for index in range(count):
+            store.append(float(index), "SYM", 100.0, 10, 100.0, "Buy")
+
+    heap = Heap(mode="max")
+
+    def push_heap():
+        for item, key in enumerate(keys):
+            heap.push(item, key)
+
+    def peek_heap():
+        for _ in range(count):
+            heap.peek()
+
+    def pop_heap():
+        while heap.pop() is not None:
+            pass
+
+    results["dynamic_array_append_per_s"] = rate(count, timed(append_dynamic_array))
+    results["trade_store_append_per_s"] = rate(count, timed(append_trade_store))
+    results["heap_push_per_s"] = rate(count, timed(push_heap))
+    results["heap_peek_per_s"] = rate(count, timed(peek_heap))
+    results["heap_pop_per_s"] = rate(count, timed(pop_heap))
+    return results
+
+
+def bench_indexes(engine, seed):
+    trades = list(engine.all_trades)
+    count = len(trades)
+    metrics = engine.all_trades.performance_metrics().tolist()
+    results = {}
+    portfolio_manager = PortfolioManager()
+
+    def insert_portfolio():
+        for trade in trades:
+            portfolio_manager.add_trade(trade)
+
+    def build_portfolio():
+        PortfolioManager().build(trades)
+
+    tracker = TransactionTracker(engine.all_trades)
+    trade_indices = np.arange(count)
+
+    def add_to_tracker():
+        for trade in trades:
+            tracker.add_trade(trade)
+
+    def rebuild_tracker():
+        TransactionTracker(engine.all_trades).rebuild(trade_indices, metrics)
+
+    results["portfolio_insert_per_s"] = rate(count, timed(insert_portfolio))
+    results["portfolio_build_s"] = timed(build_portfolio)
+    results["tracker_add_per_s"] = rate(count, timed(add_to_tracker))
+    results["tracker_rebuild_s"] = timed(rebuild_tracker)
+    results["tracker_peek_per_s"] = rate(count, timed(lambda: [tracker.get_best_trade() for _ in range(count)]))
+    random_generator = random.Random(seed)
+    timestamps = engine.all_trades.column("timestamps")
+    windows = []
+    for _ in range(QUERY_COUNT):
+        first_index = random_generator.randrange(max(count - 100, 1))
+        windows.append((timestamps[first_index].item(), timestamps[min(first_index + 100, count - 1)].item()))
+    results["range_query_100"] = sample_latencies(engine.portfolio_manager.trades_between, windows)
+    results["window_totals"] = sample_latencies(engine.portfolio_manager.totals_between, windows)
+    return results
+
+
+def gui_tick(engine, timestamp):
+    engine.price_tick(timestamp)
+    engine.best_trade()
+    engine.worst_trade()
+    engine.top_trades(LEADERBOARD_SIZE)
+    engine.top_trades(LEADERBOARD_SIZE, worst=True)
+
+
+def bench_engine(count, seed):
+    columns, symbols, market_prices = generate_columns(count, seed=seed)
+    results = {}
+    start = time.perf_counter()
+    engine = build_engine(columns, symbols, market_prices, seed)
+    results["startup_s"] = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        save_snapshot(engine, os.path.join(directory, SNAPSHOT_FILE), 0)
+        start = time.perf_counter()
+        recovered_engine = recover(directory)
+        results["recover_s"] = time.perf_counter() - start
+        recovered_engine.close()
+    results["tick_latency"] = sample_latencies(gui_tick, [(engine, float(tick)) for tick in range(TICK_COUNT)])
+    results["price_update_latency"] = sample_latencies(engine.update_all_prices, [(float(tick),) for tick in range(TICK_COUNT, 2 * TICK_COUNT)])
+    engine.flush_metrics()
+    random_generator = random.Random(seed)
+    last_timestamp = columns["timestamps"][-1].item()
+    new_trades = [(random_generator.choice(symbols), random_generator.uniform(10, 500), random_generator.randint(1, 1000), last_timestamp + index)
+                  for index in range(SAMPLE_COUNT)]
+    results["add_trade_latency"] = sample_latencies(engine.add_trade, new_trades)
+    results.update(bench_indexes(engine, seed))
+    del engine
+    gc.collect()
+    tracemalloc.start()
+    build_engine(columns, symbols, market_prices, seed)
+    results["startup_peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, seed):
+    report = {
+        "metadata": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+            "symbols": SYMBOL_COUNT,
+            "ticks": TICK_COUNT,
+        },
+        "results": {},
+    }
+    for count in sizes:
+        results = bench_containers(count, seed)
+        results.update(bench_engine(count, seed))
+        report["results"][str(count)] = results
+        print_results(count, results)
+    return report
+
+
+def print_results(count, results):
+    print(f"{count} trades")
+    for name, value in results.items():
+        if isinstance(value, dict):
+            print(f"  {name:<30}" + "  ".join(f"{key} {number:.3f}" for key, number in value.items()))
+        elif name.endswith("_per_s"):
+            print(f"  {name:<30}{value:,.0f}")
+        elif name.endswith("_bytes"):
+            print(f"  {name:<30}{value / 2 ** 20:,.1f} MiB")
+        else:
+            print(f"  {name:<30}{value:.3f}")
+
+
+def compare_heaps(count):
+    random_generator = random.Random(7)
+    new_prices = [random_generator.uniform(10, 500) for _ in range(count)]
+    comparator_results = bench_comparator_heap(generate_trades(count), new_prices)
+    cached_results = bench_cached_key_heap(generate_trades(count), new_prices)
+    print(f"{count} trades through one max-heap")
+    print(f"{'phase':<10}{'comparator':>12}{'cached key':>12}{'speedup':>10}")
+    for phase, comparator_seconds, cached_seconds in zip(("push", "reprice", "pop"), comparator_results, cached_results):
+        print(f"{phase:<10}{comparator_seconds:>11.2f}s{cached_seconds:>11.2f}s{comparator_seconds / cached_seconds:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trading engine's data structures and tick loop.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="trade counts to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON report")
+    parser.add_argument("--compare-heaps", type=int, metavar="COUNT", help="only compare the comparator heap with the cached-key heap")
+    arguments = parser.parse_args()
+    if arguments.compare_heaps:
+        compare_heaps(arguments.compare_heaps)
+        return
+    report = run_suite(arguments.sizes, arguments.seed)
+    with open(arguments.output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Wrote {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import numpy as np
+
+CANDLE_FIELDS = ("start", "open", "high", "low", "close")
+
+
+class CandleRing:
+    def __init__(self, period, max_capacity, on_evict=None, capacity=8):
+        self.period = period
+        self.max_capacity = max_capacity
+        self.on_evict = on_evict
+        self.candles = np.zeros((min(capacity, max_capacity), 5))
+        self.first = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        return len(self.candles)
+
+    def bucket(self, timestamp):
+        return timestamp - timestamp % self.period
+
+    def latest(self):
+        return self.candles[(self.first + self.count - 1) % self.capacity] if self.count else None
+
+    def merge(self, bucket_start, open_price, high, low, close):
+        latest_candle = self.latest()
+        if latest_candle is not None and bucket_start <= latest_candle[0]:
+            if high > latest_candle[2]:
+                latest_candle[2] = high
+            if low < latest_candle[3]:
+                latest_candle[3] = low
+            latest_candle[4] = close
+            return
+        if self.count == self.capacity:
+            self.make_room()
+        index = (self.first + self.count) % self.capacity
+        self.candles[index] = (bucket_start, open_price, high, low, close)
+        self.count += 1
+
+    def make_room(self):
+        if self.capacity < self.max_capacity:
+            grown_candles = np.zeros((min(2 * self.capacity, self.max_capacity), 5))
+            copied_count = 0
+            for segment in self.segments(self.count):
+                grown_candles[copied_count:copied_count + len(segment)] = segment
+                copied_count += len(segment)
+            self.candles = grown_candles
+            self.first = 0
+        elif self.on_evict is not None:
+            evicted_count = self.count // 2
+            for segment in self.segments(evicted_count):
+                self.on_evict(segment)
+            self.first = (self.first + evicted_count) % self.capacity
+            self.count -= evicted_count
+        else:
+            self.first = (self.first + 1) % self.capacity
+            self.count -= 1
+
+    def segments(self, count):
+        stop = self.first + count
+        if stop <= self.capacity:
+            return (self.candles[self.first:stop],)
+        return self.candles[self.first:], self.candles[:stop - self.capacity]
+
+    def ordered(self):
+        stop = self.first + self.count
+        if stop <= self.capacity:
+            return self.candles[self.first:stop]
+        return np.concatenate((self.candles[self.first:], self.candles[:stop - self.capacity]))
+
+    def load(self, candles):
+        candles = candles[-self.max_capacity:]
+        self.candles = np.zeros((max(len(candles), min(8, self.max_capacity)), 5))
+        self.candles[:len(candles)] = candles
+        self.first = 0
+        self.count = len(candles)
+
+
+class CandleSeries:
+    def __init__(self, resolutions, max_candles, on_evict=None):
+        self.rings = [CandleRing(resolutions[0], max_candles, on_evict)]
+        self.rings.extend(CandleRing(period, max_candles) for period in resolutions[1:])
+
+    def update(self, price, timestamp):
+        self.merge_bar(price, price, price, price, timestamp)
+
+    def merge_bar(self, open_price, high, low, close, timestamp):
+        base_ring = self.rings[0]
+        base_ring.merge(base_ring.bucket(timestamp), open_price, high, low, close)
+        finer_candle = base_ring.latest()
+        for ring in self.rings[1:]:
+            start, open_price, high, low, close = finer_candle.tolist()
+            ring.merge(ring.bucket(start), open_price, high, low, close)
+            finer_candle = ring.latest()
+
+    def latest_close(self):
+        return self.rings[0].latest()[4].item()
+
+
+class CandleBook:
+    RESOLUTIONS = (10, 60, 300, 3600)
+    MAX_CANDLES = 512
+
+    def __init__(self, resolutions=RESOLUTIONS, max_candles=MAX_CANDLES, on_evict=None):
+        self.resolutions = tuple(resolutions)
+        self.max_candles = max_candles
+        self.on_evict = on_evict
+        self.series_by_symbol = {}
+
+    def __contains__(self, symbol):
+        return symbol in self.series_by_symbol
+
+    def series(self, symbol):
+        candle_series = self.series_by_symbol.get(symbol)
+        if candle_series is None:
+            on_evict = None
+            if self.on_evict is not None:
+                on_evict = lambda candles: self.on_evict(symbol, candles)
+            candle_series = CandleSeries(self.resolutions, self.max_candles, on_evict)
+            self.series_by_symbol[symbol] = candle_series
+        return candle_series
+
+    def update(self, symbol, price, timestamp):
+        self.series(symbol).update(price, timestamp)
+
+    def merge_bar(self, symbol, open_price, high, low, close, timestamp):
+        self.series(symbol).merge_bar(open_price, high, low, close, timestamp)
+
+    def latest_close(self, symbol):
+        candle_series = self.series_by_symbol.get(symbol)
+        return candle_series.latest_close() if candle_series is not None else None
+
+    def ring(self, symbol, resolution=None):
+        candle_series = self.series_by_symbol.get(symbol)
+        if candle_series is None:
+            return None
+        return candle_series.rings[self.resolutions.index(resolution) if resolution is not None else 0]
+
+    def state(self, symbol_ids_by_name):
+        symbol_ids = []
+        counts = []
+        blocks = []
+        for symbol, candle_series in self.series_by_symbol.items():
+            symbol_ids.append(symbol_ids_by_name[symbol])
+            counts.append([len(ring) for ring in candle_series.rings])
+            blocks.extend(ring.ordered() for ring in candle_series.rings)
+        return {
+            "candle_symbol_ids": np.array(symbol_ids, dtype=np.int32),
+            "candle_counts": np.array(counts, dtype=np.int64).reshape(-1, len(self.resolutions)),
+            "candle_data": np.concatenate(blocks) if blocks else np.zeros((0, 5)),
+        }
+
+    def load_state(self, symbols, symbol_ids, counts, data):
+        self.series_by_symbol = {}
+        offset = 0
+        for symbol_id, ring_counts in zip(symbol_ids.tolist(), counts.tolist()):
+            candle_series = self.series(symbols[symbol_id])
+            for ring, count in zip(candle_series.rings, ring_counts):
+                ring.load(data[offset:offset + count])
+                offset += count
+
+
+def resample(columns, period):
+    if len(columns["start"]) == 0:
+        return columns
+    buckets = columns["start"] - columns["start"] % period
+    first_indices = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    last_indices = np.append(first_indices[1:], len(buckets)) - 1
+    return {
+        "start": buckets[first_indices],
+        "open": columns["open"][first_indices],
+        "high": np.maximum.reduceat(columns["high"], first_indices),
+        "low": np.minimum.reduceat(columns["low"], first_indices),
+        "close": columns["close"][last_indices],
+    }
@@ -0,0 +1,1349 @@
+import bisect
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from candles import CANDLE_FIELDS, CandleBook, resample
+
+class Trade:
+    __slots__ = ("store", "trade_id")
+
+    def __init__(self, store, trade_id):
+        self.store = store
+        self.trade_id = trade_id
+
+    @property
+    def index(self):
+        return self.store.row_index(self.trade_id)
+
+    @property
+    def timestamp(self):
+        return self.store.timestamps.item(self.index)
+
+    @property
+    def symbol(self):
+        return self.store.symbols[self.store.symbol_ids.item(self.index)]
+
+    @property
+    def is_open(self):
+        return self.store.trade_types.item(self.index) == 0 and self.store.volumes.item(self.index) > 0
+
+    @property
+    def price(self):
+        if self.is_open:
+            return self.store.price_book.get_price(self.store.symbol_ids.item(self.index))
+        return self.store.prices.item(self.index)
+
+    @price.setter
+    def price(self, value):
+        if self.is_open:
+            self.store.price_book.set_price(self.store.symbol_ids.item(self.index), value)
+        else:
+            self.store.prices[self.index] = value
+
+    @property
+    def volume(self):
+        return self.store.volumes.item(self.index)
+
+    @volume.setter
+    def volume(self, value):
+        if value <= 0 and self.is_open:
+            self.store.prices[self.index] = self.price
+        self.store.volumes[self.index] = value
+
+    @property
+    def original_price(self):
+        return self.store.original_prices.item(self.index)
+
+    @property
+    def original_volume(self):
+        return self.store.original_volumes.item(self.index)
+
+    @property
+    def trade_type(self):
+        return TradeStore.TRADE_TYPES[self.store.trade_types.item(self.index)]
+
+    def performance_metric(self):
+        return (self.price - self.original_price) * self.volume
+
+    def reduce_volume(self, amount):
+        self.volume = max(self.volume - amount, 0)
+
+    def __eq__(self, other):
+        return isinstance(other, Trade) and self.store is other.store and self.trade_id == other.trade_id
+
+    def __hash__(self):
+        return self.trade_id
+
+    def __str__(self):
+        return (f"Trade(Symbol: {self.symbol}, Type: {self.trade_type}, Price: {self.price:.2f}, "
+                f"Volume: {self.volume}, Orig.Price: {self.original_price:.2f}, Time: {self.timestamp:.2f})")
+
+class PriceBook:
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.size = 0
+        self.prices = np.zeros(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self.size
+
+    def get_price(self, symbol_id):
+        return self.prices.item(symbol_id)
+
+    def set_price(self, symbol_id, price):
+        if symbol_id >= self.capacity:
+            self._resize(max(2 * self.capacity, symbol_id + 1))
+        self.prices[symbol_id] = price
+        self.size = max(self.size, symbol_id + 1)
+
+    def set_prices(self, symbol_ids, prices):
+        if not len(symbol_ids):
+            return
+        required_size = int(np.max(symbol_ids)) + 1
+        if required_size > self.capacity:
+            self._resize(max(2 * self.capacity, required_size))
+        self.prices[symbol_ids] = prices
+        self.size = max(self.size, required_size)
+
+    def _resize(self, new_capacity):
+        new_prices = np.zeros(new_capacity, dtype=np.float64)
+        new_prices[:self.size] = self.prices[:self.size]
+        self.prices = new_prices
+        self.capacity = new_capacity
+
+    def column(self):
+        return self.prices[:self.size]
+
+class TradeStore:
+    TRADE_TYPES = ("Buy", "Sell")
+    COLUMNS = (
+        ("timestamps", np.float64),
+        ("prices", np.float64),
+        ("volumes", np.int64),
+        ("original_prices", np.float64),
+        ("original_volumes", np.int64),
+        ("symbol_ids", np.int32),
+        ("trade_types", np.int8),
+    )
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.size = 0
+        self.first_trade_id = 0
+        self.set_carried_trade_ids(())
+        self.symbols = []
+        self.symbol_ids_by_name = {}
+        self.symbol_ids_by_key = {}
+        self.price_book = PriceBook()
+        for column_name, dtype in self.COLUMNS:
+            setattr(self, column_name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError("Trade index out of range")
+        return Trade(self, self.trade_id_at(index))
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield Trade(self, self.trade_id_at(index))
+
+    @property
+    def next_trade_id(self):
+        return self.first_trade_id + self.size - self.carried_count
+
+    def set_carried_trade_ids(self, trade_ids):
+        self.carried_trade_ids = np.array(trade_ids, dtype=np.int64)
+        self.carried_count = len(self.carried_trade_ids)
+        self.carried_rows = {trade_id: index for index, trade_id in enumerate(self.carried_trade_ids.tolist())}
+
+    def trade_id_at(self, index):
+        if index < self.carried_count:
+            return self.carried_trade_ids.item(index)
+        return self.first_trade_id + index - self.carried_count
+
+    def trade_ids(self):
+        return np.concatenate((self.carried_trade_ids, np.arange(self.first_trade_id, self.next_trade_id)))
+
+    def trade_ids_at(self, indices):
+        if not self.carried_count:
+            return self.first_trade_id + indices
+        carried_count = self.carried_count
+        return np.where(indices < carried_count, self.carried_trade_ids[np.minimum(indices, carried_count - 1)],
+                        self.first_trade_id + indices - carried_count)
+
+    def row_indices(self, trade_ids):
+        indices = np.asarray(trade_ids, dtype=np.int64) - self.first_trade_id + self.carried_count
+        if self.carried_count:
+            is_carried = indices < self.carried_count
+            indices[is_carried] = np.searchsorted(self.carried_trade_ids, indices[is_carried] + self.first_trade_id - self.carried_count)
+        return indices
+
+    def row_index(self, trade_id):
+        index = trade_id - self.first_trade_id + self.carried_count
+        if self.carried_count <= index < self.size:
+            return index
+        index = self.carried_rows.get(trade_id)
+        if index is None:
+            raise KeyError(f"Unknown trade id: {trade_id}")
+        return index
+
+    def get_trade(self, trade_id):
+        self.row_index(trade_id)
+        return Trade(self, trade_id)
+
+    def intern_symbol(self, symbol):
+        symbol_id = self.symbol_ids_by_key.get(symbol.lower())
+        if symbol_id is None:
+            symbol_id = len(self.symbols)
+            self.symbols.append(symbol)
+            self.symbol_ids_by_name[symbol] = symbol_id
+            self.symbol_ids_by_key[symbol.lower()] = symbol_id
+        return symbol_id
+
+    def symbol_id(self, symbol):
+        return self.symbol_ids_by_key[symbol.lower()]
+
+    def append(self, timestamp, symbol, price, volume, original_price, trade_type):
+        if self.size == self.capacity:
+            self._resize(2 * self.capacity)
+        index = self.size
+        symbol_id = self.intern_symbol(symbol)
+        trade_type_id = self.TRADE_TYPES.index(trade_type)
+        if trade_type_id == 0 or symbol_id >= len(self.price_book):
+            self.price_book.set_price(symbol_id, price)
+        self.timestamps[index] = timestamp
+        self.prices[index] = price
+        self.volumes[index] = volume
+        self.original_prices[index] = original_price
+        self.original_volumes[index] = volume
+        self.symbol_ids[index] = symbol_id
+        self.trade_types[index] = trade_type_id
+        trade_id = self.next_trade_id
+        self.size += 1
+        return Trade(self, trade_id)
+
+    def load_columns(self, columns, symbols, market_prices, first_trade_id=0, carried_trade_ids=()):
+        self.size = len(columns["timestamps"])
+        self.capacity = max(self.size, 1024)
+        self.first_trade_id = first_trade_id
+        self.set_carried_trade_ids(carried_trade_ids)
+        for column_name, dtype in self.COLUMNS:
+            column = np.zeros(self.capacity, dtype=dtype)
+            column[:self.size] = columns[column_name]
+            setattr(self, column_name, column)
+        self.symbols = list(symbols)
+        self.symbol_ids_by_name = {symbol: symbol_id for symbol_id, symbol in enumerate(self.symbols)}
+        self.symbol_ids_by_key = {}
+        for symbol_id, symbol in enumerate(self.symbols):
+            self.symbol_ids_by_key.setdefault(symbol.lower(), symbol_id)
+        self.price_book = PriceBook(max(len(market_prices), 64))
+        for symbol_id, price in enumerate(np.asarray(market_prices).tolist()):
+            self.price_book.set_price(symbol_id, price)
+
+    def _resize(self, new_capacity):
+        for column_name, dtype in self.COLUMNS:
+            new_column = np.zeros(new_capacity, dtype=dtype)
+            new_column[:self.size] = getattr(self, column_name)[:self.size]
+            setattr(self, column_name, new_column)
+        self.capacity = new_capacity
+
+    def column(self, column_name):
+        return getattr(self, column_name)[:self.size]
+
+    def market_price(self, symbol):
+        return self.price_book.get_price(self.symbol_id(symbol))
+
+    def set_market_price(self, symbol, price):
+        self.price_book.set_price(self.intern_symbol(symbol), price)
+
+    def current_prices(self):
+        return np.where(self.open_buy_mask(), self.price_book.prices[self.column("symbol_ids")], self.column("prices"))
+
+    def performance_metrics(self, indices=None):
+        if indices is None:
+            return (self.current_prices() - self.column("original_prices")) * self.column("volumes")
+        volumes = self.volumes[indices]
+        symbol_ids = self.symbol_ids[indices]
+        is_open = (self.trade_types[indices] == 0) & (volumes > 0)
+        current_prices = np.where(is_open, self.price_book.prices[symbol_ids], self.prices[indices])
+        return (current_prices - self.original_prices[indices]) * volumes
+
+    def open_buy_mask(self):
+        return (self.column("trade_types") == 0) & (self.column("volumes") > 0)
+
+    def open_buy_indices(self, symbol=None):
+        open_mask = self.open_buy_mask()
+        if symbol is not None:
+            open_mask &= self.column("symbol_ids") == self.symbol_id(symbol)
+        return np.flatnonzero(open_mask)
+
+    def retire_prefix(self, count):
+        stop = self.carried_count + count
+        kept_indices = np.flatnonzero(self.open_buy_mask()[:stop])
+        kept_trade_ids = self.trade_ids()[kept_indices]
+        kept_count = len(kept_indices)
+        for column_name, _ in self.COLUMNS:
+            column = getattr(self, column_name)
+            column[:kept_count] = column[kept_indices]
+            column[kept_count:kept_count + self.size - stop] = column[stop:self.size]
+        self.size -= stop - kept_count
+        self.first_trade_id += count
+        self.set_carried_trade_ids(kept_trade_ids)
+
+
+class Heap:
+    def __init__(self, mode="min"):
+        self.data = []
+        self.positions = {}
+        self.mode = mode
+        self.sequence = itertools.count()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def push(self, item, key):
+        self.data.append([-key if self.mode == "max" else key, next(self.sequence), item])
+        self._sift_up(len(self.data) - 1)
+
+    def pop(self):
+        if not self.data:
+            return None
+        top_item = self.data[0][2]
+        self.remove(top_item)
+        return top_item
+
+    def peek(self):
+        if not self.data:
+            return None
+        return self.data[0][2]
+
+    def top(self, count):
+        data = self.data
+        ranked = []
+        frontier = [(data[0][0], data[0][1], 0)] if data else []
+        while frontier and len(ranked) < count:
+            _, _, index = heapq.heappop(frontier)
+            ranked.append(data[index][2])
+            for child_index in (2 * index + 1, 2 * index + 2):
+                if child_index < len(data):
+                    child_entry = data[child_index]
+                    heapq.heappush(frontier, (child_entry[0], child_entry[1], child_index))
+        return ranked
+
+    def build(self, items, keys):
+        sign = -1 if self.mode == "max" else 1
+        self.data = [[sign * key, next(self.sequence), item] for item, key in zip(items, keys)]
+        heapq.heapify(self.data)
+        self.positions = {entry[2]: index for index, entry in enumerate(self.data)}
+
+    def update_many(self, items, keys):
+        if len(items) * 8 < len(self.data):
+            for item, key in zip(items, keys):
+                self.update(item, key)
+            return
+        sign = -1 if self.mode == "max" else 1
+        for item, key in zip(items, keys):
+            index = self.positions.get(item)
+            if index is not None:
+                self.data[index][0] = sign * key
+        heapq.heapify(self.data)
+        self.positions = {entry[2]: index for index, entry in enumerate(self.data)}
+
+    def update(self, item, key):
+        index = self.positions.get(item)
+        if index is None:
+            return
+        entry = self.data[index]
+        heap_key = -key if self.mode == "max" else key
+        if entry[0] == heap_key:
+            return
+        entry[0] = heap_key
+        self._sift_up(index)
+        self._sift_down(self.positions[item])
+
+    def remove(self, item):
+        index = self.positions.pop(item, None)
+        if index is None:
+            return
+        last_entry = self.data.pop()
+        if index < len(self.data):
+            self.data[index] = last_entry
+            self._sift_up(index)
+            self._sift_down(self.positions[last_entry[2]])
+
+    def _sift_up(self, index):
+        data = self.data
+        positions = self.positions
+        entry = data[index]
+        while index > 0:
+            parent_index = (index - 1) // 2
+            parent_entry = data[parent_index]
+            if not entry < parent_entry:
+                break
+            data[index] = parent_entry
+            positions[parent_entry[2]] = index
+            index = parent_index
+        data[index] = entry
+        positions[entry[2]] = index
+
+    def _sift_down(self, index):
+        data = self.data
+        positions = self.positions
+        total_items = len(data)
+        entry = data[index]
+        while True:
+            best_index = 2 * index + 1
+            if best_index >= total_items:
+                break
+            right_index = best_index + 1
+            if right_index < total_items and data[right_index] < data[best_index]:
+                best_index = right_index
+            child_entry = data[best_index]
+            if not child_entry < entry:
+                break
+            data[index] = child_entry
+            positions[child_entry[2]] = index
+            index = best_index
+        data[index] = entry
+        positions[entry[2]] = index
+
+def select_entries(keys, trade_ids, count):
+    if len(keys) > count:
+        threshold = np.partition(keys, count - 1)[count - 1]
+        candidates = np.flatnonzero(keys <= threshold)
+    else:
+        candidates = np.arange(len(keys))
+    order = candidates[np.lexsort((trade_ids[candidates], keys[candidates]))][:count]
+    return list(zip(keys[order].tolist(), trade_ids[order].tolist()))
+
+class Leaderboard:
+    CAPACITY = 32
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.best_entries = []
+        self.worst_entries = []
+
+    def __len__(self):
+        return len(self.best_entries)
+
+    def entries(self, worst=False):
+        return self.worst_entries if worst else self.best_entries
+
+    def offer(self, trade_id, metric):
+        for entries, key in ((self.best_entries, -metric), (self.worst_entries, metric)):
+            if len(entries) < self.capacity or (key, trade_id) < entries[-1]:
+                bisect.insort(entries, (key, trade_id))
+                del entries[self.capacity:]
+
+    def discard(self, trade_id):
+        self.best_entries = [entry for entry in self.best_entries if entry[1] != trade_id]
+        self.worst_entries = [entry for entry in self.worst_entries if entry[1] != trade_id]
+
+    def rank(self, trade_ids, metrics):
+        self.best_entries = select_entries(-metrics, trade_ids, self.capacity)
+        self.worst_entries = select_entries(metrics, trade_ids, self.capacity)
+
+class TransactionTracker:
+    def __init__(self, store, capacity=Leaderboard.CAPACITY):
+        self.store = store
+        self.capacity = capacity
+        self.symbol_leaderboards = {}
+        self.merged_entries = {}
+
+    def symbol_leaderboard(self, symbol_id):
+        leaderboard = self.symbol_leaderboards.get(symbol_id)
+        if leaderboard is None:
+            leaderboard = self.symbol_leaderboards[symbol_id] = Leaderboard(self.capacity)
+        return leaderboard
+
+    def add_trade(self, trade):
+        if not trade.is_open:
+            return
+        self.symbol_leaderboard(self.store.symbol_ids.item(trade.index)).offer(trade.trade_id, trade.performance_metric())
+        self.merged_entries = {}
+
+    def remove_trade(self, trade):
+        symbol_id = self.store.symbol_ids.item(trade.index)
+        leaderboard = self.symbol_leaderboards.get(symbol_id)
+        if leaderboard is not None:
+            leaderboard.discard(trade.trade_id)
+            if not len(leaderboard):
+                del self.symbol_leaderboards[symbol_id]
+            self.merged_entries = {}
+
+    def rank(self, trade_indices, metrics):
+        trade_indices = np.asarray(trade_indices, dtype=np.int64)
+        metrics = np.asarray(metrics, dtype=np.float64)
+        trade_ids = self.store.trade_ids_at(trade_indices)
+        symbol_ids = self.store.symbol_ids[trade_indices]
+        order = np.argsort(symbol_ids, kind="stable")
+        self.merged_entries = {}
+        for group in np.split(order, np.flatnonzero(np.diff(symbol_ids[order])) + 1):
+            if len(group):
+                leaderboard = Leaderboard(self.capacity)
+                leaderboard.rank(trade_ids[group], metrics[group])
+                self.symbol_leaderboards[symbol_ids.item(group[0])] = leaderboard
+
+    def rebuild(self, trade_indices, metrics):
+        self.symbol_leaderboards = {}
+        self.rank(trade_indices, metrics)
+
+    def rerank_symbols(self, symbol_ids, trade_indices, metrics):
+        for symbol_id in symbol_ids:
+            self.symbol_leaderboards.pop(symbol_id, None)
+        self.rank(trade_indices, metrics)
+
+    def ranked_entries(self, count, symbol_id, worst):
+        if count > self.capacity:
+            trade_indices = self.store.open_buy_indices(None if symbol_id is None else self.store.symbols[symbol_id])
+            metrics = self.store.performance_metrics(trade_indices)
+            return select_entries(metrics if worst else -metrics, self.store.trade_ids_at(trade_indices), count)
+        if symbol_id is not None:
+            leaderboard = self.symbol_leaderboards.get(symbol_id)
+            return leaderboard.entries(worst)[:count] if leaderboard is not None else []
+        merged_entries = self.merged_entries.get(worst)
+        if merged_entries is None:
+            merged_entries = heapq.merge(*(leaderboard.entries(worst) for leaderboard in self.symbol_leaderboards.values()))
+            merged_entries = self.merged_entries[worst] = list(itertools.islice(merged_entries, self.capacity))
+        return merged_entries[:count]
+
+    def top_trades(self, count, symbol=None, worst=False):
+        symbol_id = None
+        if symbol is not None:
+            symbol_id = self.store.symbol_ids_by_key.get(symbol.lower())
+            if symbol_id is None:
+                return []
+        return [self.store.get_trade(trade_id) for _, trade_id in self.ranked_entries(count, symbol_id, worst)]
+
+    def get_best_trade(self):
+        ranked = self.top_trades(1)
+        return ranked[0] if ranked else None
+
+    def get_worst_trade(self):
+        ranked = self.top_trades(1, worst=True)
+        return ranked[0] if ranked else None
+
+class PriceSimulator:
+    GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(self, max_fluctuation=0.05, seed=None):
+        self.max_fluctuation = max_fluctuation
+        self.symbol_volatility = {}
+        self.random_generator = np.random.default_rng(seed)
+        self.seed_key = np.random.SeedSequence(seed).generate_state(1, np.uint64)[0]
+        self.tick_count = 0
+        self.symbol_keys = np.zeros(0, dtype=np.uint64)
+
+    def set_volatility(self, symbol, max_fluctuation):
+        self.symbol_volatility[symbol] = max_fluctuation
+
+    def volatility_by_symbol_id(self, store):
+        return np.array([self.symbol_volatility.get(symbol, self.max_fluctuation) for symbol in store.symbols])
+
+    def simulate_price(self, symbol, price):
+        max_fluctuation = self.symbol_volatility.get(symbol, self.max_fluctuation)
+        return price * (1 + self.random_generator.uniform(-max_fluctuation, max_fluctuation))
+
+    @staticmethod
+    def splitmix64(values):
+        values = values + PriceSimulator.GOLDEN_GAMMA
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+    def symbol_keys_for(self, symbols):
+        if len(self.symbol_keys) != len(symbols):
+            self.symbol_keys = np.array([int.from_bytes(hashlib.blake2b(symbol.encode("utf-8"), digest_size=8).digest(), "little")
+                                         for symbol in symbols], dtype=np.uint64)
+        return self.symbol_keys
+
+    def tick_draws(self, symbols):
+        tick_key = self.splitmix64(np.array([self.seed_key ^ np.uint64(self.tick_count)]))
+        self.tick_count += 1
+        random_bits = self.splitmix64(self.symbol_keys_for(symbols) ^ tick_key)
+        return (random_bits >> np.uint64(11)).astype(np.float64) * (2.0 / (1 << 53)) - 1.0
+
+    def update_prices(self, store):
+        symbol_count = len(store.price_book)
+        max_fluctuations = self.volatility_by_symbol_id(store)[:symbol_count]
+        store.price_book.prices[:symbol_count] *= 1 + self.tick_draws(store.symbols[:symbol_count]) * max_fluctuations
+        return np.arange(symbol_count)
+
+class TradeRowError(ValueError):
+    def __init__(self, row_number, rows_applied, error):
+        super().__init__(f"Row {row_number}: {error}")
+        self.row_number = row_number
+        self.rows_applied = rows_applied
+
+class LotIndex:
+    POLICIES = ("fifo", "lifo", "highest_cost")
+
+    def __init__(self, store, policy="fifo"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown lot policy: {policy}")
+        self.store = store
+        self.policy = policy
+        self.lots = {}
+        self.open_volumes = {}
+
+    def _lot_key(self, trade):
+        if self.policy == "lifo":
+            return (-trade.timestamp, -trade.trade_id)
+        if self.policy == "highest_cost":
+            return (-trade.original_price, trade.timestamp, trade.trade_id)
+        return (trade.timestamp, trade.trade_id)
+
+    def add_lot(self, trade):
+        if not trade.is_open:
+            return
+        symbol_key = trade.symbol.lower()
+        heapq.heappush(self.lots.setdefault(symbol_key, []), (self._lot_key(trade), trade.trade_id))
+        self.open_volumes[symbol_key] = self.open_volumes.get(symbol_key, 0) + trade.volume
+
+    def open_volume(self, symbol):
+        return self.open_volumes.get(symbol.lower(), 0)
+
+    def open_trade_ids(self, symbol):
+        return [trade_id for _, trade_id in self.lots.get(symbol.lower(), ())]
+
+    def peek_lot(self, symbol):
+        symbol_lots = self.lots.get(symbol.lower())
+        if not symbol_lots:
+            return None
+        return self.store.get_trade(symbol_lots[0][1])
+
+    def consume(self, symbol, volume):
+        symbol_key = symbol.lower()
+        if volume <= 0 or volume > self.open_volume(symbol):
+            raise ValueError(f"Invalid sell volume. Must be between 1 and {self.open_volume(symbol)}")
+        symbol_lots = self.lots[symbol_key]
+        consumed = []
+        remaining = volume
+        while remaining > 0:
+            lot = self.store.get_trade(symbol_lots[0][1])
+            sold_volume = min(lot.volume, remaining)
+            lot.reduce_volume(sold_volume)
+            consumed.append((lot, sold_volume))
+            remaining -= sold_volume
+            if lot.volume == 0:
+                heapq.heappop(symbol_lots)
+        self.open_volumes[symbol_key] -= volume
+        if not symbol_lots:
+            del self.lots[symbol_key]
+            del self.open_volumes[symbol_key]
+        return consumed
+
+class PositionLedger:
+    def __init__(self, store, capacity=64):
+        self.store = store
+        self.open_volumes = np.zeros(capacity, dtype=np.int64)
+        self.cost_bases = np.zeros(capacity, dtype=np.float64)
+        self.realized_pnls = np.zeros(capacity, dtype=np.float64)
+        self.marked_prices = np.zeros(capacity, dtype=np.float64)
+        self.cost_basis = 0.0
+        self.market_value = 0.0
+        self.realized_pnl = 0.0
+
+    @property
+    def capacity(self):
+        return len(self.open_volumes)
+
+    def _ensure_capacity(self, symbol_count):
+        if symbol_count <= self.capacity:
+            return
+        new_capacity = max(2 * self.capacity, symbol_count)
+        for column_name in ("open_volumes", "cost_bases", "realized_pnls", "marked_prices"):
+            column = getattr(self, column_name)
+            new_column = np.zeros(new_capacity, dtype=column.dtype)
+            new_column[:len(column)] = column
+            setattr(self, column_name, new_column)
+
+    def mark_symbol(self, symbol_id):
+        self._ensure_capacity(symbol_id + 1)
+        price = self.store.price_book.get_price(symbol_id)
+        self.market_value += self.open_volumes.item(symbol_id) * (price - self.marked_prices.item(symbol_id))
+        self.marked_prices[symbol_id] = price
+        return price
+
+    def mark(self, symbol_ids):
+        self._ensure_capacity(len(self.store.price_book))
+        prices = self.store.price_book.prices[symbol_ids]
+        self.market_value += float(self.open_volumes[symbol_ids] @ (prices - self.marked_prices[symbol_ids]))
+        self.marked_prices[symbol_ids] = prices
+
+    def record_buy(self, symbol_id, price, volume):
+        market_price = self.mark_symbol(symbol_id)
+        self.open_volumes[symbol_id] += volume
+        self.cost_bases[symbol_id] += price * volume
+        self.cost_basis += price * volume
+        self.market_value += market_price * volume
+
+    def record_sell(self, symbol_id, volume, original_price, sale_price):
+        market_price = self.mark_symbol(symbol_id)
+        realized_pnl = (sale_price - original_price) * volume
+        self.open_volumes[symbol_id] -= volume
+        self.cost_bases[symbol_id] -= original_price * volume
+        self.realized_pnls[symbol_id] += realized_pnl
+        self.cost_basis -= original_price * volume
+        self.market_value -= market_price * volume
+        self.realized_pnl += realized_pnl
+
+    def add_realized(self, symbol_ids, trade_types, prices, original_prices, volumes, symbol_count):
+        is_sell = trade_types == TradeStore.TRADE_TYPES.index("Sell")
+        realized_pnls = (prices[is_sell] - original_prices[is_sell]) * volumes[is_sell]
+        self.realized_pnls[:symbol_count] += np.bincount(symbol_ids[is_sell], realized_pnls, minlength=symbol_count)[:symbol_count]
+
+    def rebuild(self, archive=None):
+        store = self.store
+        symbol_count = max(len(store.symbols), len(store.price_book))
+        self.open_volumes = np.zeros(max(symbol_count, 64), dtype=np.int64)
+        self.cost_bases = np.zeros_like(self.open_volumes, dtype=np.float64)
+        self.realized_pnls = np.zeros_like(self.cost_bases)
+        self.marked_prices = np.zeros_like(self.cost_bases)
+        open_indices = store.open_buy_indices()
+        open_symbol_ids = store.symbol_ids[open_indices]
+        open_volumes = store.volumes[open_indices]
+        self.open_volumes[:symbol_count] = np.bincount(open_symbol_ids, open_volumes, minlength=symbol_count)[:symbol_count].astype(np.int64)
+        self.cost_bases[:symbol_count] = np.bincount(open_symbol_ids, store.original_prices[open_indices] * open_volumes, minlength=symbol_count)[:symbol_count]
+        self.add_realized(store.column("symbol_ids"), store.column("trade_types"), store.column("prices"),
+                          store.column("original_prices"), store.column("volumes"), symbol_count)
+        if archive is not None and len(archive):
+            self.add_realized(archive.symbol_ids, archive.trade_types, archive.prices, archive.original_prices, archive.volumes, symbol_count)
+        self.marked_prices[:len(store.price_book)] = store.price_book.column()
+        self.cost_basis = float(self.cost_bases.sum())
+        self.market_value = float(self.open_volumes @ self.marked_prices)
+        self.realized_pnl = float(self.realized_pnls.sum())
+
+    def position(self, symbol_id):
+        open_volume = self.open_volumes.item(symbol_id) if symbol_id < self.capacity else 0
+        cost_basis = self.cost_bases.item(symbol_id) if symbol_id < self.capacity else 0.0
+        market_price = self.store.price_book.get_price(symbol_id)
+        return {
+            "open_volume": open_volume,
+            "cost_basis": cost_basis,
+            "average_cost": cost_basis / open_volume if open_volume else 0.0,
+            "market_price": market_price,
+            "market_value": open_volume * market_price,
+            "realized_pnl": self.realized_pnls.item(symbol_id) if symbol_id < self.capacity else 0.0,
+            "unrealized_pnl": open_volume * market_price - cost_basis,
+        }
+
+    def totals(self):
+        return {
+            "cost_basis": self.cost_basis,
+            "market_value": self.market_value,
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.market_value - self.cost_basis,
+        }
+
+class AVLNode:
+    __slots__ = ("key", "trade", "height", "left", "right", "volume", "notional", "metric",
+                 "count", "total_volume", "total_notional", "total_metric")
+
+    def __init__(self, key, trade):
+        self.key = key
+        self.trade = trade
+        self.height = 1
+        self.left = None
+        self.right = None
+        self.volume = trade.original_volume
+        if trade.trade_type == "Sell":
+            self.notional = trade.price * self.volume
+            self.metric = trade.performance_metric()
+        else:
+            self.notional = trade.original_price * self.volume
+            self.metric = 0.0
+        self.count = 1
+        self.total_volume = self.volume
+        self.total_notional = self.notional
+        self.total_metric = self.metric
+
+    def update_totals(self):
+        count = 1
+        total_volume = self.volume
+        total_notional = self.notional
+        total_metric = self.metric
+        for child in (self.left, self.right):
+            if child is not None:
+                count += child.count
+                total_volume += child.total_volume
+                total_notional += child.total_notional
+                total_metric += child.total_metric
+        self.count = count
+        self.total_volume = total_volume
+        self.total_notional = total_notional
+        self.total_metric = total_metric
+
+class PortfolioManager:
+    def __init__(self, archive=None, store=None):
+        self.root = None
+        self.archive = archive
+        self.store = store
+
+    def live_trade(self, trade):
+        if trade is not None and self.store is not None and trade.trade_id in self.store.carried_rows:
+            return Trade(self.store, trade.trade_id)
+        return trade
+
+    def get_height(self, node):
+        return node.height if node else 0
+
+    def get_balance(self, node):
+        return self.get_height(node.left) - self.get_height(node.right) if node else 0
+
+    def right_rotate(self, node_y):
+        node_x = node_y.left
+        subtree_T2 = node_x.right
+        node_x.right = node_y
+        node_y.left = subtree_T2
+        node_y.height = 1 + max(self.get_height(node_y.left), self.get_height(node_y.right))
+        node_x.height = 1 + max(self.get_height(node_x.left), self.get_height(node_x.right))
+        node_y.update_totals()
+        node_x.update_totals()
+        return node_x
+
+    def left_rotate(self, node_x):
+        node_y = node_x.right
+        subtree_T2 = node_y.left
+        node_y.left = node_x
+        node_x.right = subtree_T2
+        node_x.height = 1 + max(self.get_height(node_x.left), self.get_height(node_x.right))
+        node_y.height = 1 + max(self.get_height(node_y.left), self.get_height(node_y.right))
+        node_x.update_totals()
+        node_y.update_totals()
+        return node_y
+
+    def insert_node(self, current_node, key, trade):
+        new_node = AVLNode(key, trade)
+        if current_node is None:
+            return new_node
+        path = []
+        node = current_node
+        while node:
+            path.append(node)
+            node.count += 1
+            node.total_volume += new_node.volume
+            node.total_notional += new_node.notional
+            node.total_metric += new_node.metric
+            node = node.left if key < node.key else node.right
+        if key < path[-1].key:
+            path[-1].left = new_node
+        else:
+            path[-1].right = new_node
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            left_height = node.left.height if node.left else 0
+            right_height = node.right.height if node.right else 0
+            height = 1 + max(left_height, right_height)
+            if -1 <= left_height - right_height <= 1:
+                if height == node.height:
+                    break
+                node.height = height
+                continue
+            node.height = height
+            balanced_node = self.rebalance(node)
+            if depth == 0:
+                current_node = balanced_node
+            elif path[depth - 1].left is node:
+                path[depth - 1].left = balanced_node
+            else:
+                path[depth - 1].right = balanced_node
+            break
+        return current_node
+
+    def rebalance(self, current_node):
+        balance_factor = self.get_balance(current_node)
+        if balance_factor > 1 and self.get_balance(current_node.left) >= 0:
+            return self.right_rotate(current_node)
+        if balance_factor < -1 and self.get_balance(current_node.right) <= 0:
+            return self.left_rotate(current_node)
+        if balance_factor > 1:
+            current_node.left = self.left_rotate(current_node.left)
+            return self.right_rotate(current_node)
+        if balance_factor < -1:
+            current_node.right = self.right_rotate(current_node.right)
+            return self.left_rotate(current_node)
+        return current_node
+
+    def add_trade(self, trade):
+        self.root = self.insert_node(self.root, trade.timestamp, trade)
+
+    def build(self, sorted_trades):
+        self.root = self.build_balanced(sorted_trades, 0, len(sorted_trades))
+
+    def build_balanced(self, sorted_trades, start, stop):
+        if start >= stop:
+            return None
+        middle = (start + stop) // 2
+        trade = sorted_trades[middle]
+        node = AVLNode(trade.timestamp, trade)
+        node.left = self.build_balanced(sorted_trades, start, middle)
+        node.right = self.build_balanced(sorted_trades, middle + 1, stop)
+        node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
+        node.update_totals()
+        return node
+
+    def prefix_totals(self, timestamp, inclusive=True):
+        count = 0
+        total_volume = 0
+        total_notional = 0.0
+        total_metric = 0.0
+        node = self.root
+        while node:
+            if node.key < timestamp or (inclusive and node.key == timestamp):
+                count += 1
+                total_volume += node.volume
+                total_notional += node.notional
+                total_metric += node.metric
+                if node.left is not None:
+                    count += node.left.count
+                    total_volume += node.left.total_volume
+                    total_notional += node.left.total_notional
+                    total_metric += node.left.total_metric
+                node = node.right
+            else:
+                node = node.left
+        return np.array([count, total_volume, total_notional, total_metric], dtype=np.float64)
+
+    def totals_between(self, start_time, end_time):
+        totals = self.prefix_totals(end_time) - self.prefix_totals(start_time, inclusive=False)
+        if self.archive is not None:
+            totals += self.archive.totals_between(start_time, end_time)
+        count, volume, notional, metric = totals.tolist()
+        return {"count": int(count), "volume": int(volume), "notional": notional, "metric": metric}
+
+    def iterate(self, start_time=None, end_time=None):
+        live_trades = self.iterate_live(start_time, end_time)
+        if self.archive is None or not len(self.archive):
+            return live_trades
+        archived_trades = map(self.live_trade, self.archive.iterate(start_time, end_time))
+        if self.root is None or self.archive.latest_timestamp <= self.first_key():
+            return itertools.chain(archived_trades, live_trades)
+        return heapq.merge(archived_trades, live_trades, key=self.trade_key)
+
+    @staticmethod
+    def trade_key(trade):
+        return trade.timestamp, trade.trade_id
+
+    def first_key(self):
+        node = self.root
+        while node.left is not None:
+            node = node.left
+        return node.key
+
+    def iterate_live(self, start_time=None, end_time=None):
+        stack = []
+        node = self.root
+        while True:
+            while node:
+                if start_time is not None and node.key < start_time:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if end_time is not None and node.key > end_time:
+                return
+            yield node.trade
+            node = node.right
+
+    def trades_between(self, start_time, end_time):
+        return list(self.iterate(start_time, end_time))
+
+    def floor(self, timestamp):
+        best_node = None
+        node = self.root
+        while node:
+            if node.key <= timestamp:
+                best_node = node
+                node = node.right
+            else:
+                node = node.left
+        live_trade = best_node.trade if best_node is not None else None
+        archived_trade = self.live_trade(self.archive.floor(timestamp)) if self.archive is not None else None
+        if live_trade is None or archived_trade is None:
+            return archived_trade if live_trade is None else live_trade
+        return max(live_trade, archived_trade, key=self.trade_key)
+
+    def ceiling(self, timestamp):
+        best_node = None
+        node = self.root
+        while node:
+            if node.key >= timestamp:
+                best_node = node
+                node = node.left
+            else:
+                node = node.right
+        live_trade = best_node.trade if best_node is not None else None
+        archived_trade = self.live_trade(self.archive.ceiling(timestamp)) if self.archive is not None else None
+        if live_trade is None or archived_trade is None:
+            return archived_trade if live_trade is None else live_trade
+        return min(live_trade, archived_trade, key=self.trade_key)
+
+    def get_inorder(self):
+        return list(self.iterate())
+
+class PriceUpdateWorker(threading.Thread):
+    def __init__(self, tick_function, results, lock, interval=5.0):
+        super().__init__(name="price-update-worker", daemon=True)
+        self.tick_function = tick_function
+        self.results = results
+        self.lock = lock
+        self.interval = interval
+        self.wake_event = threading.Event()
+        self.pause_event = threading.Event()
+        self.stop_event = threading.Event()
+
+    def trigger(self):
+        self.wake_event.set()
+
+    def pause(self):
+        self.pause_event.set()
+
+    def resume(self):
+        self.pause_event.clear()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            triggered = self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+            if self.stop_event.is_set():
+                break
+            if self.pause_event.is_set() and not triggered:
+                continue
+            with self.lock:
+                try:
+                    result = self.tick_function()
+                except Exception as error:
+                    result = error
+            self.results.put(result)
+
+class TradingEngine:
+    STARTING_WALLET = 10000.0
+    CANDLE_RESOLUTIONS = CandleBook.RESOLUTIONS
+    MAX_CANDLES = CandleBook.MAX_CANDLES
+    MAX_LIVE_TRADES = 100000
+
+    def __init__(self, wallet=STARTING_WALLET, price_simulator=None, lot_policy="fifo", archive=None, max_live_trades=MAX_LIVE_TRADES, clock=time.time):
+        self.all_trades = TradeStore()
+        self.archive = archive
+        self.max_live_trades = max_live_trades
+        self.transaction_tracker = TransactionTracker(self.all_trades)
+        self.portfolio_manager = PortfolioManager(archive, self.all_trades)
+        self.price_simulator = price_simulator or PriceSimulator()
+        self.lot_index = LotIndex(self.all_trades, lot_policy)
+        self.position_ledger = PositionLedger(self.all_trades)
+        self.wallet = wallet
+        self.candles = CandleBook(self.CANDLE_RESOLUTIONS, self.MAX_CANDLES, self.archive_candles if archive is not None else None)
+        self.lock = threading.RLock()
+        self.journal = None
+        self.clock = clock
+        self.stale_symbol_ids = set()
+
+    def add_trade(self, symbol, price, volume, timestamp=None):
+        new_trade = self.record_buy(symbol, price, volume, timestamp)
+        self.metrics_changed(np.array([self.all_trades.symbol_id(symbol)], dtype=np.int32))
+        self.trades_recorded()
+        return new_trade
+
+    def record_buy(self, symbol, price, volume, timestamp=None):
+        if volume <= 0 or not price > 0:
+            raise ValueError("Buy price and volume must be positive")
+        trade_timestamp = self.clock() if timestamp is None else timestamp
+        new_trade = self.all_trades.append(trade_timestamp, symbol, price, volume, price, "Buy")
+        symbol_id = self.all_trades.symbol_id(symbol)
+        symbol = self.all_trades.symbols[symbol_id]
+        self.transaction_tracker.add_trade(new_trade)
+        self.portfolio_manager.add_trade(new_trade)
+        self.lot_index.add_lot(new_trade)
+        self.position_ledger.record_buy(symbol_id, price, volume)
+        self.wallet -= price * volume
+        self.update_stock_history(symbol, price, trade_timestamp)
+        if self.journal is not None:
+            self.journal.append_buy(trade_timestamp, symbol, price, volume)
+        return new_trade
+
+    def open_volume(self, symbol):
+        return self.lot_index.open_volume(symbol)
+
+    def sell_trade(self, symbol, volume, timestamp=None):
+        sell_trades = self.record_sell(symbol, volume, timestamp)
+        self.trades_recorded()
+        return sell_trades
+
+    def record_sell(self, symbol, volume, timestamp=None):
+        consumed_lots = self.lot_index.consume(symbol, volume)
+        trade_timestamp = self.clock() if timestamp is None else timestamp
+        sell_trades = []
+        for buy_trade, lot_volume in consumed_lots:
+            current_price = buy_trade.price
+            sell_trade = self.all_trades.append(trade_timestamp, buy_trade.symbol, current_price, lot_volume, buy_trade.original_price, "Sell")
+            self.portfolio_manager.add_trade(sell_trade)
+            if not buy_trade.is_open:
+                self.transaction_tracker.remove_trade(buy_trade)
+            self.position_ledger.record_sell(self.all_trades.symbol_id(buy_trade.symbol), lot_volume, buy_trade.original_price, current_price)
+            self.wallet += current_price * lot_volume
+            sell_trades.append(sell_trade)
+        self.stale_symbol_ids.add(self.all_trades.symbol_id(buy_trade.symbol))
+        self.update_stock_history(buy_trade.symbol, current_price, trade_timestamp)
+        if self.journal is not None:
+            self.journal.append_sell(trade_timestamp, symbol, volume)
+        return sell_trades
+
+    def add_trades(self, rows, first_row_number=1):
+        touched_symbol_ids = set()
+        row_count = 0
+        try:
+            for timestamp, symbol, trade_type, price, volume in rows:
+                try:
+                    if trade_type == "Sell":
+                        if volume <= 0 or volume > self.open_volume(symbol):
+                            raise ValueError(f"Invalid sell volume. Must be between 1 and {self.open_volume(symbol)}")
+                        self.set_sell_price(symbol, price, timestamp)
+                        self.record_sell(symbol, volume, timestamp)
+                    else:
+                        self.record_buy(symbol, price, volume, timestamp)
+                except ValueError as error:
+                    raise TradeRowError(first_row_number + row_count, row_count, error) from None
+                touched_symbol_ids.add(self.all_trades.symbol_id(symbol))
+                row_count += 1
+        finally:
+            if touched_symbol_ids:
+                self.metrics_changed(np.fromiter(touched_symbol_ids, dtype=np.int32, count=len(touched_symbol_ids)))
+                self.trades_recorded()
+        return row_count
+
+    def set_sell_price(self, symbol, price, timestamp):
+        self.all_trades.set_market_price(symbol, price)
+        symbol_id = self.all_trades.symbol_id(symbol)
+        self.position_ledger.mark_symbol(symbol_id)
+        self.stale_symbol_ids.add(symbol_id)
+        if self.journal is not None:
+            self.journal_prices(self.clock() if timestamp is None else timestamp, [symbol_id], [price])
+
+    def journal_symbols(self):
+        symbols = self.all_trades.symbols
+        if len(symbols) > self.journal.symbol_count:
+            self.journal.append_symbols(symbols[self.journal.symbol_count:])
+
+    def journal_prices(self, timestamp, symbol_ids, prices):
+        self.journal_symbols()
+        self.journal.append_prices(timestamp, symbol_ids, prices)
+
+    def journal_bars(self, symbol_ids, bars):
+        self.journal_symbols()
+        self.journal.append_bars(symbol_ids, bars)
+
+    def trades_recorded(self):
+        if self.journal is not None:
+            self.snapshot_if_due()
+        self.page_out_if_due()
+
+    def metrics_changed(self, symbol_ids):
+        self.stale_symbol_ids.update(symbol_ids.tolist())
+
+    def flush_metrics(self):
+        stale_symbol_ids = self.stale_symbol_ids
+        if not stale_symbol_ids:
+            return
+        self.stale_symbol_ids = set()
+        store = self.all_trades
+        if len(stale_symbol_ids) == len(store.price_book):
+            trade_indices = store.open_buy_indices()
+        else:
+            trade_ids = []
+            for symbol_id in stale_symbol_ids:
+                trade_ids.extend(self.lot_index.open_trade_ids(store.symbols[symbol_id]))
+            trade_indices = store.row_indices(trade_ids)
+        self.refresh_trade_metrics(stale_symbol_ids, trade_indices)
+
+    def refresh_trade_metrics(self, symbol_ids, trade_indices):
+        self.transaction_tracker.rerank_symbols(symbol_ids, trade_indices, self.all_trades.performance_metrics(trade_indices))
+
+    def rebuild_portfolio(self):
+        store = self.all_trades
+        carried_count = store.carried_count
+        timestamps = store.column("timestamps")[carried_count:]
+        if np.all(timestamps[1:] >= timestamps[:-1]):
+            sorted_indices = range(carried_count, len(store))
+        else:
+            sorted_indices = (np.argsort(timestamps, kind="stable") + carried_count).tolist()
+        sorted_trades = [store[index] for index in sorted_indices]
+        self.portfolio_manager = PortfolioManager(self.archive, store)
+        self.portfolio_manager.build(sorted_trades)
+
+    def rebuild_indexes(self):
+        store = self.all_trades
+        open_indices = store.open_buy_indices()
+        self.stale_symbol_ids = set()
+        self.transaction_tracker = TransactionTracker(store)
+        self.transaction_tracker.rebuild(open_indices, store.performance_metrics(open_indices))
+        self.lot_index = LotIndex(store, self.lot_index.policy)
+        for index in open_indices.tolist():
+            self.lot_index.add_lot(store[index])
+        self.position_ledger.rebuild(self.archive)
+        self.rebuild_portfolio()
+
+    def update_all_prices(self, timestamp=None):
+        updated_symbol_ids = self.price_simulator.update_prices(self.all_trades)
+        return self.prices_updated(updated_symbol_ids, timestamp)
+
+    def price_tick(self, timestamp=None):
+        current_time = self.update_all_prices(timestamp)
+        self.flush_metrics()
+        return current_time
+
+    def update_trade_price(self, trade, timestamp=None):
+        if not trade.is_open:
+            raise ValueError("Selected trade is not an active buy trade.")
+        symbol = trade.symbol
+        new_price = self.price_simulator.simulate_price(symbol, trade.price)
+        self.all_trades.set_market_price(symbol, new_price)
+        self.prices_updated(np.array([self.all_trades.symbol_id(symbol)]), timestamp)
+        return new_price
+
+    def apply_prices(self, symbol_ids, prices, timestamp=None):
+        self.all_trades.price_book.set_prices(symbol_ids, prices)
+        return self.prices_updated(symbol_ids, timestamp)
+
+    def apply_price_bars(self, bars):
+        store = self.all_trades
+        updated_symbol_ids = {}
+        bar_symbol_ids = []
+        bar_rows = []
+        latest_time = None
+        for symbol, open_price, high, low, close, timestamp in bars:
+            symbol_id = store.intern_symbol(symbol)
+            store.price_book.set_price(symbol_id, close)
+            self.candles.merge_bar(store.symbols[symbol_id], open_price, high, low, close, timestamp)
+            updated_symbol_ids[symbol_id] = None
+            bar_symbol_ids.append(symbol_id)
+            bar_rows.append((open_price, high, low, close, timestamp))
+            latest_time = timestamp if latest_time is None else max(latest_time, timestamp)
+        if self.journal is not None and bar_symbol_ids:
+            self.journal_bars(bar_symbol_ids, bar_rows)
+        symbol_ids = np.fromiter(updated_symbol_ids, dtype=np.int32, count=len(updated_symbol_ids))
+        return self.prices_updated(symbol_ids, latest_time, from_bars=True)
+
+    def prices_updated(self, symbol_ids, timestamp=None, from_bars=False):
+        current_time = self.clock() if timestamp is None else timestamp
+        self.position_ledger.mark(symbol_ids)
+        self.metrics_changed(symbol_ids)
+        updated_prices = self.all_trades.price_book.prices[symbol_ids]
+        if not from_bars:
+            for symbol_id, price in zip(symbol_ids.tolist(), updated_prices.tolist()):
+                self.update_stock_history(self.all_trades.symbols[symbol_id], price, current_time)
+        if self.journal is not None:
+            if not from_bars:
+                self.journal_prices(current_time, symbol_ids, updated_prices)
+            self.snapshot_if_due()
+        return current_time
+
+    def page_out(self, keep_recent):
+        store = self.all_trades
+        page_count = max(len(store) - store.carried_count - keep_recent, 0)
+        if page_count == 0:
+            return 0
+        self.archive.archive_trades(store, page_count)
+        self.archive.settle_trades(store, np.flatnonzero(~store.open_buy_mask()[:store.carried_count]))
+        store.retire_prefix(page_count)
+        self.rebuild_indexes()
+        if self.journal is not None:
+            self.journal.write_snapshot(self)
+        return page_count
+
+    def page_out_if_due(self):
+        if self.archive is not None and len(self.all_trades) - self.all_trades.carried_count > self.max_live_trades:
+            self.page_out(self.max_live_trades // 2)
+
+    def snapshot_if_due(self):
+        if self.journal.needs_snapshot():
+            self.journal.write_snapshot(self)
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.write_snapshot(self)
+            self.journal.close()
+
+    def update_stock_history(self, symbol, new_price, timestamp):
+        self.candles.update(symbol, new_price, timestamp)
+
+    def archive_candles(self, symbol, candles):
+        self.archive.archive_candles(self.all_trades.symbols, symbol, candles)
+
+    def candle_history(self, symbol, start_time=None, resolution=None, limit=None):
+        ring = self.candles.ring(symbol, resolution)
+        live_candles = ring.ordered() if ring is not None else np.zeros((0, 5))
+        columns = {field: live_candles[:, position] for position, field in enumerate(CANDLE_FIELDS)}
+        live_count = len(live_candles)
+        if start_time is not None:
+            live_count -= int(np.searchsorted(live_candles[:, 0], start_time, side="left"))
+        live_covers_window = len(live_candles) and ((start_time is not None and start_time >= live_candles[0, 0])
+                                                    or (limit is not None and live_count >= limit))
+        if self.archive is not None and not live_covers_window:
+            period = resolution or self.CANDLE_RESOLUTIONS[0]
+            archived_candles = self.archive.candle_range(symbol, None if start_time is None else start_time - start_time % period)
+            archived_columns = {field: archived_candles[field] for field in CANDLE_FIELDS}
+            if resolution is not None and resolution != self.CANDLE_RESOLUTIONS[0]:
+                archived_columns = resample(archived_columns, resolution)
+            if len(live_candles):
+                older_mask = archived_columns["start"] < live_candles[0, 0]
+                archived_columns = {field: values[older_mask] for field, values in archived_columns.items()}
+            columns = {field: np.concatenate((archived_columns[field], values)) for field, values in columns.items()}
+        if start_time is not None:
+            recent_mask = columns["start"] >= start_time
+            columns = {field: values[recent_mask] for field, values in columns.items()}
+        if limit is not None:
+            columns = {field: values[-limit:] for field, values in columns.items()}
+        return {field: np.array(values, dtype=np.float64) for field, values in columns.items()}
+
+    def latest_price(self, symbol):
+        return self.candles.latest_close(symbol)
+
+    def trades_between(self, start_time, end_time):
+        return self.portfolio_manager.trades_between(start_time, end_time)
+
+    def totals_between(self, start_time, end_time):
+        return self.portfolio_manager.totals_between(start_time, end_time)
+
+    def symbols(self):
+        return sorted(self.all_trades.symbols)
+
+    def best_trade(self):
+        self.flush_metrics()
+        return self.transaction_tracker.get_best_trade()
+
+    def worst_trade(self):
+        self.flush_metrics()
+        return self.transaction_tracker.get_worst_trade()
+
+    def top_trades(self, count, symbol=None, worst=False):
+        self.flush_metrics()
+        return self.transaction_tracker.top_trades(count, symbol, worst)
+
+    def position(self, symbol):
+        return self.position_ledger.position(self.all_trades.symbol_id(symbol))
+
+    def portfolio_valuation(self):
+        valuation = self.position_ledger.totals()
+        valuation["wallet"] = self.wallet
+        valuation["equity"] = self.wallet + valuation["market_value"]
+        return valuation
@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import csv
+import math
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9009
+REPLAY_FIELDS = ("timestamp", "symbol", "price")
+
+
+def make_tick(symbol, price, timestamp=None):
+    symbol = symbol.strip()
+    price = float(price)
+    timestamp = float(timestamp) if timestamp else time.time()
+    if not symbol or not (math.isfinite(price) and price > 0 and math.isfinite(timestamp)):
+        raise ValueError(f"Malformed tick: {symbol},{price},{timestamp}")
+    return symbol, price, timestamp
+
+
+def parse_tick(line):
+    fields = line.strip().split(",")
+    if len(fields) < 2:
+        raise ValueError(f"Malformed tick: {line!r}")
+    return make_tick(fields[0], fields[1], fields[2] if len(fields) > 2 else None)
+
+
+def format_tick(symbol, price, timestamp):
+    return f"{symbol},{price:.6f},{timestamp:.6f}\n"
+
+
+class ReplayFileSource:
+    YIELD_EVERY = 1000
+
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+        self.skipped_ticks = 0
+
+    async def ticks(self):
+        loop = asyncio.get_running_loop()
+        first_timestamp = None
+        started_at = loop.time()
+        with open(self.path, newline="") as replay_file:
+            reader = csv.DictReader(replay_file)
+            missing_fields = set(REPLAY_FIELDS) - set(reader.fieldnames or ())
+            if missing_fields:
+                raise ValueError(f"Missing columns: {', '.join(sorted(missing_fields))}")
+            for row_number, row in enumerate(reader):
+                try:
+                    symbol, price, timestamp = make_tick(row["symbol"], row["price"], float(row["timestamp"]))
+                except (AttributeError, TypeError, ValueError):
+                    self.skipped_ticks += 1
+                    continue
+                if self.speed:
+                    if first_timestamp is None:
+                        first_timestamp = timestamp
+                    delay = (timestamp - first_timestamp) / self.speed - (loop.time() - started_at)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif row_number % self.YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+                yield symbol, price, timestamp
+
+
+class SocketSource:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, reconnect_delay=1.0):
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self.skipped_ticks = 0
+
+    async def ticks(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            try:
+                while True:
+                    try:
+                        line = await reader.readline()
+                    except OSError:
+                        break
+                    if not line:
+                        break
+                    try:
+                        tick = parse_tick(line.decode("utf-8"))
+                    except (UnicodeDecodeError, ValueError):
+                        self.skipped_ticks += 1
+                        continue
+                    yield tick
+            finally:
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+class FeedServer:
+    def __init__(self, symbols, ticks_per_second=1000, max_fluctuation=0.001, seed=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.symbols = list(symbols)
+        self.ticks_per_second = ticks_per_second
+        self.max_fluctuation = max_fluctuation
+        self.random_generator = np.random.default_rng(seed)
+        self.prices = self.random_generator.uniform(10, 500, len(self.symbols))
+        self.host = host
+        self.port = port
+        self.clients = set()
+
+    async def handle_client(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            await reader.read()
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def next_ticks(self, count):
+        symbol_indices = self.random_generator.integers(0, len(self.symbols), count)
+        factors = 1 + self.random_generator.uniform(-self.max_fluctuation, self.max_fluctuation, count)
+        timestamp = time.time()
+        lines = []
+        for symbol_index, factor in zip(symbol_indices.tolist(), factors.tolist()):
+            self.prices[symbol_index] *= factor
+            lines.append(format_tick(self.symbols[symbol_index], self.prices[symbol_index], timestamp))
+        return "".join(lines).encode("utf-8")
+
+    async def broadcast(self, interval=0.01):
+        ticks_per_interval = max(1, int(self.ticks_per_second * interval))
+        while True:
+            await asyncio.sleep(interval)
+            if not self.clients:
+                continue
+            payload = self.next_ticks(ticks_per_interval)
+            for writer in list(self.clients):
+                writer.write(payload)
+            await asyncio.gather(*(writer.drain() for writer in list(self.clients)), return_exceptions=True)
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        async with server:
+            await self.broadcast()
+
+
+class FeedIngestor(threading.Thread):
+    def __init__(self, engine, source, results=None, flush_interval=0.05):
+        super().__init__(name="feed-ingestor", daemon=True)
+        self.engine = engine
+        self.source = source
+        self.results = results
+        self.flush_interval = flush_interval
+        self.bar_period = engine.candles.resolutions[0]
+        self.open_bars = {}
+        self.closed_bars = []
+        self.ticks_received = 0
+        self.batches_applied = 0
+        self.source_finished = False
+        self.error = None
+        self.loop = None
+        self.stop_event = None
+        self.stop_requested = threading.Event()
+
+    def add_tick(self, symbol, price, timestamp):
+        self.ticks_received += 1
+        bucket = timestamp - timestamp % self.bar_period
+        bar = self.open_bars.get(symbol)
+        if bar is None or bucket != bar[0]:
+            if bar is not None:
+                self.closed_bars.append((symbol, *bar[1:]))
+            self.open_bars[symbol] = [bucket, price, price, price, price, timestamp]
+            return
+        if price > bar[2]:
+            bar[2] = price
+        if price < bar[3]:
+            bar[3] = price
+        bar[4] = price
+        bar[5] = timestamp
+
+    def report_error(self, error):
+        self.error = error
+        if self.results is not None:
+            self.results.put(error)
+
+    def apply_bars(self, bars):
+        try:
+            with self.engine.lock:
+                applied_at = self.engine.apply_price_bars(bars)
+                self.engine.flush_metrics()
+        except Exception as error:
+            self.report_error(error)
+            self.stop()
+            return
+        self.batches_applied += 1
+        if self.results is not None:
+            self.results.put(applied_at)
+
+    async def flush(self):
+        if not self.open_bars:
+            return
+        bars = self.closed_bars
+        bars.extend((symbol, *bar[1:]) for symbol, bar in self.open_bars.items())
+        self.open_bars = {}
+        self.closed_bars = []
+        await asyncio.to_thread(self.apply_bars, bars)
+
+    async def read_source(self):
+        try:
+            async for symbol, price, timestamp in self.source.ticks():
+                self.add_tick(symbol, price, timestamp)
+        except Exception as error:
+            self.report_error(error)
+        finally:
+            self.source_finished = True
+            self.stop_event.set()
+
+    async def ingest(self):
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        if self.stop_requested.is_set():
+            return
+        reader_task = asyncio.create_task(self.read_source())
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        finally:
+            reader_task.cancel()
+            await asyncio.gather(reader_task, return_exceptions=True)
+            if self.error is None:
+                await self.flush()
+
+    def run(self):
+        try:
+            asyncio.run(self.ingest())
+        finally:
+            self.loop = None
+
+    def stop(self):
+        self.stop_requested.set()
+        loop = self.loop
+        if loop is not None and self.stop_event is not None:
+            try:
+                loop.call_soon_threadsafe(self.stop_event.set)
+            except RuntimeError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in market data feed.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--symbols", type=int, default=50, help="number of synthetic symbols")
+    parser.add_argument("--rate", type=int, default=1000, help="ticks per second")
+    parser.add_argument("--seed", type=int)
+    arguments = parser.parse_args()
+    server = FeedServer([f"SYM{index}" for index in range(arguments.symbols)], arguments.rate, seed=arguments.seed,
+                        host=arguments.host, port=arguments.port)
+    print(f"Serving {arguments.rate} ticks/s for {arguments.symbols} symbols on {arguments.host}:{arguments.port}")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
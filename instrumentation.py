@@ -0,0 +1,170 @@
+import cProfile
+import collections
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+
+ENGINE_STAGES = (
+    ("update_all_prices", "tick"),
+    ("apply_price_bars", "feed_batch"),
+    ("prices_updated", "tick.apply"),
+    ("refresh_trade_metrics", "tick.metrics"),
+    ("update_stock_history", "candles"),
+    ("add_trade", "add_trade"),
+    ("sell_trade", "sell_trade"),
+    ("add_trades", "import_batch"),
+    ("rebuild_indexes", "rebuild_indexes"),
+    ("page_out", "page_out"),
+)
+
+
+class StageStats:
+    SAMPLE_COUNT = 1024
+
+    def __init__(self):
+        self.samples = collections.deque(maxlen=self.SAMPLE_COUNT)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples.clear()
+
+    def record(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.maximum:
+            self.maximum = elapsed
+        self.samples.append(elapsed)
+
+    def summary(self):
+        recent_samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000.0,
+            "mean_ms": self.total * 1000.0 / self.count if self.count else 0.0,
+            "p95_ms": recent_samples[int(0.95 * (len(recent_samples) - 1))] * 1000.0 if recent_samples else 0.0,
+            "max_ms": self.maximum * 1000.0,
+        }
+
+
+class Instrumentation:
+    MEMORY_TOP_LINES = 25
+    PROFILE_TOP_LINES = 40
+
+    def __init__(self):
+        self.enabled = False
+        self.targets = []
+        self.stages = {}
+        self.profile = None
+        self.profile_guard = threading.Lock()
+        self.capture_report = None
+
+    def instrument(self, target, method_name, stage_name=None):
+        self.targets.append((target, method_name, stage_name or method_name))
+        if self.enabled:
+            self.install(target, method_name, stage_name or method_name)
+
+    def instrument_engine(self, engine):
+        for method_name, stage_name in ENGINE_STAGES:
+            self.instrument(engine, method_name, stage_name)
+        self.instrument(engine.price_simulator, "update_prices", "tick.simulate")
+
+    def install(self, target, method_name, stage_name):
+        function = getattr(target, method_name)
+        stage = self.stages.setdefault(stage_name, StageStats())
+        setattr(target, method_name, self.wrap(function, stage))
+
+    def wrap(self, function, stage):
+        def timed_call(*arguments, **keyword_arguments):
+            start = time.perf_counter()
+            try:
+                if self.profile is not None and self.profile_guard.acquire(blocking=False):
+                    try:
+                        profile = self.profile
+                        if profile is not None:
+                            return profile.runcall(function, *arguments, **keyword_arguments)
+                    finally:
+                        self.profile_guard.release()
+                return function(*arguments, **keyword_arguments)
+            finally:
+                stage.record(time.perf_counter() - start)
+        return timed_call
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        for target, method_name, stage_name in self.targets:
+            self.install(target, method_name, stage_name)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.stop_capture()
+        self.enabled = False
+        for target, method_name, _ in self.targets:
+            target.__dict__.pop(method_name, None)
+
+    def reset(self):
+        for stage in self.stages.values():
+            stage.reset()
+
+    @property
+    def capturing(self):
+        return self.profile is not None
+
+    def start_capture(self, trace_memory=True):
+        if self.capturing:
+            return
+        self.enable()
+        self.capture_report = None
+        if trace_memory:
+            tracemalloc.start()
+        self.profile = cProfile.Profile()
+
+    def stop_capture(self):
+        if not self.capturing:
+            return self.capture_report
+        with self.profile_guard:
+            profile = self.profile
+            self.profile = None
+        profile.create_stats()
+        profile_text = io.StringIO()
+        profile_stats = None
+        if profile.stats:
+            profile_stats = pstats.Stats(profile, stream=profile_text)
+            profile_stats.sort_stats("cumulative").print_stats(self.PROFILE_TOP_LINES)
+        else:
+            profile_text.write("No instrumented calls ran during the capture.\n")
+        memory_lines = []
+        if tracemalloc.is_tracing():
+            memory_snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory_lines.append(f"peak traced memory: {peak_bytes / 2 ** 20:.1f} MiB")
+            memory_lines.extend(str(statistic) for statistic in memory_snapshot.statistics("lineno")[:self.MEMORY_TOP_LINES])
+        self.capture_report = {"profile": profile_text.getvalue(), "memory": memory_lines, "stats": profile_stats}
+        return self.capture_report
+
+    def snapshot(self):
+        return {stage_name: stage.summary() for stage_name, stage in self.stages.items() if stage.count}
+
+    def summary_lines(self, limit=8):
+        stage_summaries = sorted(self.snapshot().items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        return [f"{stage_name:<16}{summary['count']:>7} calls {summary['mean_ms']:>9.2f} ms avg {summary['p95_ms']:>9.2f} ms p95"
+                for stage_name, summary in stage_summaries[:limit]]
+
+    def export(self, path):
+        report = {"exported_at": time.time(), "stages": self.snapshot()}
+        if self.capture_report is not None:
+            report["profile"] = self.capture_report["profile"]
+            report["memory"] = self.capture_report["memory"]
+            if self.capture_report["stats"] is not None:
+                self.capture_report["stats"].dump_stats(path + ".prof")
+        with open(path, "w") as report_file:
+            json.dump(report, report_file, indent=2)
@@ -0,0 +1,210 @@
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from archive import TradeArchive
+from engine import TradingEngine
+
+JOURNAL_FILE = "trades.journal"
+SNAPSHOT_FILE = "state.snapshot.npz"
+
+
+def journal_file_name(generation):
+    return JOURNAL_FILE if generation == 0 else f"trades.{generation}.journal"
+
+
+def is_journal_file(file_name):
+    return file_name.startswith("trades.") and file_name.endswith(".journal")
+
+
+def sync_directory(directory):
+    if hasattr(os, "O_DIRECTORY"):
+        directory_descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+
+
+class TradeJournal:
+    RECORD_BUY = 1
+    RECORD_SELL = 2
+    RECORD_PRICES = 3
+    RECORD_SYMBOLS = 4
+    RECORD_BARS = 5
+    HEADER = struct.Struct("<BII")
+    BUY = struct.Struct("<dqd")
+    SELL = struct.Struct("<dq")
+    PRICES = struct.Struct("<d")
+
+    def __init__(self, path, snapshot_path=None, sync_every=64, snapshot_every=10000, generation=0):
+        self.path = path
+        self.generation = generation
+        self.snapshot_path = snapshot_path
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+        self.records_since_sync = 0
+        self.records_since_snapshot = 0
+        self.symbol_count = 0
+        self.file = open(path, "ab")
+
+    @property
+    def position(self):
+        return self.file.tell()
+
+    def append(self, record_type, payload):
+        self.file.write(self.HEADER.pack(record_type, len(payload), zlib.crc32(payload)))
+        self.file.write(payload)
+        self.records_since_sync += 1
+        self.records_since_snapshot += 1
+        if self.records_since_sync >= self.sync_every:
+            self.sync()
+
+    def append_buy(self, timestamp, symbol, price, volume):
+        self.append(self.RECORD_BUY, self.BUY.pack(timestamp, volume, price) + symbol.encode("utf-8"))
+
+    def append_sell(self, timestamp, symbol, volume):
+        self.append(self.RECORD_SELL, self.SELL.pack(timestamp, volume) + symbol.encode("utf-8"))
+
+    def append_prices(self, timestamp, symbol_ids, prices):
+        payload = self.PRICES.pack(timestamp) + np.asarray(symbol_ids, dtype=np.int32).tobytes() + np.asarray(prices, dtype=np.float64).tobytes()
+        self.append(self.RECORD_PRICES, payload)
+
+    def append_bars(self, symbol_ids, bars):
+        payload = np.asarray(symbol_ids, dtype=np.int32).tobytes() + np.asarray(bars, dtype=np.float64).tobytes()
+        self.append(self.RECORD_BARS, payload)
+
+    def append_symbols(self, symbols):
+        self.append(self.RECORD_SYMBOLS, "\n".join(symbols).encode("utf-8"))
+        self.symbol_count += len(symbols)
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.records_since_sync = 0
+
+    def needs_snapshot(self):
+        return self.snapshot_path is not None and self.records_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, engine):
+        if self.snapshot_path is None:
+            return
+        self.sync()
+        next_generation = self.generation + 1
+        next_path = os.path.join(os.path.dirname(self.path), journal_file_name(next_generation))
+        next_file = open(next_path, "wb")
+        save_snapshot(engine, self.snapshot_path, 0, next_generation)
+        self.file.close()
+        os.remove(self.path)
+        self.file = next_file
+        self.path = next_path
+        self.generation = next_generation
+        self.records_since_snapshot = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    @classmethod
+    def read_records(cls, path, offset=0):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as journal_file:
+            journal_file.seek(offset)
+            while True:
+                header = journal_file.read(cls.HEADER.size)
+                if len(header) < cls.HEADER.size:
+                    return
+                record_type, length, checksum = cls.HEADER.unpack(header)
+                payload = journal_file.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    return
+                yield record_type, payload, journal_file.tell()
+
+
+def save_snapshot(engine, path, journal_offset, journal_generation=0):
+    store = engine.all_trades
+    metadata = {
+        "symbols": store.symbols,
+        "first_trade_id": store.first_trade_id,
+        "wallet": engine.wallet,
+        "journal_generation": journal_generation,
+        "journal_offset": journal_offset,
+    }
+    columns = {column_name: store.column(column_name) for column_name, _ in store.COLUMNS}
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        np.savez(snapshot_file,
+                 market_prices=store.price_book.column(),
+                 carried_trade_ids=store.carried_trade_ids,
+                 metadata=np.frombuffer(json.dumps(metadata).encode("utf-8"), dtype=np.uint8),
+                 **engine.candles.state(store.symbol_ids_by_name),
+                 **columns)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+    sync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def load_snapshot(engine, path):
+    with np.load(path) as snapshot:
+        metadata = json.loads(snapshot["metadata"].tobytes().decode("utf-8"))
+        columns = {column_name: snapshot[column_name] for column_name, _ in engine.all_trades.COLUMNS if column_name in snapshot.files}
+        columns.setdefault("original_volumes", columns["volumes"])
+        carried_trade_ids = snapshot["carried_trade_ids"] if "carried_trade_ids" in snapshot.files else ()
+        engine.all_trades.load_columns(columns, metadata["symbols"], snapshot["market_prices"], metadata["first_trade_id"], carried_trade_ids)
+        if "candle_data" in snapshot.files:
+            engine.candles.load_state(metadata["symbols"], snapshot["candle_symbol_ids"], snapshot["candle_counts"], snapshot["candle_data"])
+    engine.wallet = metadata["wallet"]
+    engine.rebuild_indexes()
+    return metadata.get("journal_generation", 0), metadata["journal_offset"]
+
+
+def replay_record(engine, record_type, payload):
+    if record_type == TradeJournal.RECORD_BUY:
+        timestamp, volume, price = TradeJournal.BUY.unpack_from(payload)
+        engine.add_trade(payload[TradeJournal.BUY.size:].decode("utf-8"), price, volume, timestamp)
+    elif record_type == TradeJournal.RECORD_SELL:
+        timestamp, volume = TradeJournal.SELL.unpack_from(payload)
+        engine.sell_trade(payload[TradeJournal.SELL.size:].decode("utf-8"), volume, timestamp)
+    elif record_type == TradeJournal.RECORD_PRICES:
+        (timestamp,) = TradeJournal.PRICES.unpack_from(payload)
+        body = payload[TradeJournal.PRICES.size:]
+        count = len(body) // 12
+        symbol_ids = np.frombuffer(body, dtype=np.int32, count=count)
+        prices = np.frombuffer(body, dtype=np.float64, offset=4 * count)
+        engine.apply_prices(symbol_ids, prices, timestamp)
+    elif record_type == TradeJournal.RECORD_BARS:
+        count = len(payload) // 44
+        symbol_ids = np.frombuffer(payload, dtype=np.int32, count=count).tolist()
+        bars = np.frombuffer(payload, dtype=np.float64, offset=4 * count).reshape(count, 5).tolist()
+        symbols = engine.all_trades.symbols
+        engine.apply_price_bars([(symbols[symbol_id], *bar) for symbol_id, bar in zip(symbol_ids, bars)])
+    elif record_type == TradeJournal.RECORD_SYMBOLS:
+        for symbol in payload.decode("utf-8").split("\n"):
+            engine.all_trades.intern_symbol(symbol)
+
+
+def recover(directory, sync_every=64, snapshot_every=10000, **engine_options):
+    os.makedirs(directory, exist_ok=True)
+    snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+    engine = TradingEngine(archive=TradeArchive(directory), **engine_options)
+    generation, offset = load_snapshot(engine, snapshot_path) if os.path.exists(snapshot_path) else (0, 0)
+    journal_path = os.path.join(directory, journal_file_name(generation))
+    for file_name in os.listdir(directory):
+        if is_journal_file(file_name) and file_name != journal_file_name(generation):
+            os.remove(os.path.join(directory, file_name))
+    archived_count = len(engine.archive)
+    for record_type, payload, offset in TradeJournal.read_records(journal_path, offset):
+        replay_record(engine, record_type, payload)
+    if os.path.exists(journal_path) and os.path.getsize(journal_path) > offset:
+        os.truncate(journal_path, offset)
+    engine.journal = TradeJournal(journal_path, snapshot_path, sync_every, snapshot_every, generation)
+    engine.journal.symbol_count = len(engine.all_trades.symbols)
+    if len(engine.archive) != archived_count:
+        engine.journal.write_snapshot(engine)
+    return engine
@@ -0,0 +1,162 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import EVENT_TYPES, Backtest, read_events, synthetic_events
+from engine import LotIndex, TradingEngine
+
+EVENT_DTYPE = np.dtype([("timestamp", "f8"), ("event", "i1"), ("symbol_id", "i4"), ("price", "f8"), ("volume", "i8")])
+SUMMED_FIELDS = ("rejected", "trades", "realized_pnl", "unrealized_pnl")
+
+
+class SharedEvents:
+    def __init__(self, memory, count, symbols, owner=False):
+        self.memory = memory
+        self.count = count
+        self.symbols = symbols
+        self.owner = owner
+        self.events = np.ndarray(count, dtype=EVENT_DTYPE, buffer=memory.buf)
+
+    @classmethod
+    def create(cls, events):
+        symbols = []
+        symbol_ids_by_name = {}
+        rows = []
+        for timestamp, event_type, symbol, price, volume in events:
+            symbol_id = -1
+            if symbol is not None:
+                symbol_id = symbol_ids_by_name.setdefault(symbol, len(symbols))
+                if symbol_id == len(symbols):
+                    symbols.append(symbol)
+            rows.append((timestamp, EVENT_TYPES.index(event_type), symbol_id,
+                         np.nan if price is None else price, -1 if volume is None else volume))
+        memory = shared_memory.SharedMemory(create=True, size=max(1, len(rows) * EVENT_DTYPE.itemsize))
+        shared_events = cls(memory, len(rows), symbols, owner=True)
+        shared_events.events[:] = np.array(rows, dtype=EVENT_DTYPE)
+        return shared_events
+
+    @classmethod
+    def attach(cls, spec):
+        name, count, symbols = spec
+        return cls(shared_memory.SharedMemory(name=name), count, symbols)
+
+    @property
+    def spec(self):
+        return self.memory.name, self.count, self.symbols
+
+    def iter_events(self, symbols=None):
+        events = self.events
+        if symbols is not None:
+            symbol_ids = [self.symbols.index(symbol) for symbol in symbols]
+            events = events[np.isin(events["symbol_id"], symbol_ids) | (events["symbol_id"] < 0)]
+        for timestamp, event_code, symbol_id, price, volume in zip(events["timestamp"].tolist(), events["event"].tolist(),
+                                                                   events["symbol_id"].tolist(), events["price"].tolist(),
+                                                                   events["volume"].tolist()):
+            yield (timestamp, EVENT_TYPES[event_code], self.symbols[symbol_id] if symbol_id >= 0 else None,
+                   None if price != price else price, None if volume < 0 else volume)
+
+    def close(self):
+        self.events = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+worker_events = None
+
+
+def attach_worker(spec):
+    global worker_events
+    worker_events = SharedEvents.attach(spec)
+
+
+def run_job(job):
+    started_at = time.perf_counter()
+    backtest = Backtest(job["seed"], job["volatility"], job["lot_policy"], job["wallet"])
+    report = backtest.run(worker_events.iter_events(job["symbols"]))
+    report.pop("candles")
+    report["elapsed_seconds"] = time.perf_counter() - started_at
+    return job, report
+
+
+def shard_symbols(symbols, shard_count):
+    shard_count = max(1, min(shard_count, len(symbols)))
+    return [symbols[index::shard_count] for index in range(shard_count)]
+
+
+def sweep_jobs(symbols, volatilities, lot_policies, shard_count=1, seed=0, wallet=TradingEngine.STARTING_WALLET):
+    symbol_shards = shard_symbols(symbols, shard_count) if shard_count > 1 else [None]
+    return [{"volatility": volatility, "lot_policy": lot_policy, "symbols": shard, "seed": seed, "wallet": wallet}
+            for volatility, lot_policy, shard in itertools.product(volatilities, lot_policies, symbol_shards)]
+
+
+def merge_results(results):
+    merged = {}
+    for job, report in results:
+        key = (job["volatility"], job["lot_policy"])
+        combined = merged.get(key)
+        if combined is None:
+            combined = {"volatility": job["volatility"], "lot_policy": job["lot_policy"], "wallet": job["wallet"],
+                        "events": 0, "ticks": report["ticks"], "open_positions": {}, "shards": []}
+            combined.update((field, 0) for field in SUMMED_FIELDS)
+            merged[key] = combined
+        for field in SUMMED_FIELDS:
+            combined[field] += report[field]
+        combined["events"] += report["events"] - report["ticks"]
+        combined["wallet"] += report["wallet"] - job["wallet"]
+        combined["open_positions"].update(report["open_positions"])
+        combined["shards"].append({"symbols": job["symbols"], "digest": report["digest"], "elapsed_seconds": report["elapsed_seconds"]})
+    for combined in merged.values():
+        combined["events"] += combined["ticks"]
+    return sorted(merged.values(), key=lambda combined: (combined["volatility"], combined["lot_policy"]))
+
+
+def run_sweep(events, volatilities, lot_policies, shard_count=1, seed=0, workers=None):
+    shared_events = SharedEvents.create(events)
+    try:
+        jobs = sweep_jobs(shared_events.symbols, volatilities, lot_policies, shard_count, seed)
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_worker, initargs=(shared_events.spec,)) as executor:
+            results = list(executor.map(run_job, jobs))
+    finally:
+        shared_events.close()
+    return merge_results(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run backtests for a grid of parameters across a process pool.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--events", help="CSV of timestamp,event,symbol,price,volume")
+    source.add_argument("--synthetic", type=int, metavar="COUNT", help="generate COUNT seeded synthetic events")
+    parser.add_argument("--symbols", type=int, default=20, help="symbol count for synthetic events")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--volatility", type=float, nargs="+", default=[0.05])
+    parser.add_argument("--lot-policy", nargs="+", default=["fifo"], choices=LotIndex.POLICIES)
+    parser.add_argument("--shards", type=int, default=1, help="split the symbols into this many independent shards")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the JSON results here instead of printing them")
+    arguments = parser.parse_args()
+    if arguments.events:
+        events = read_events(arguments.events)
+    else:
+        events = synthetic_events(arguments.synthetic, [f"SYM{index}" for index in range(arguments.symbols)], arguments.seed)
+    started_at = time.perf_counter()
+    results = run_sweep(events, arguments.volatility, arguments.lot_policy, arguments.shards, arguments.seed, arguments.workers)
+    elapsed_seconds = time.perf_counter() - started_at
+    if arguments.output:
+        with open(arguments.output, "w") as results_file:
+            json.dump({"elapsed_seconds": elapsed_seconds, "results": results}, results_file, indent=2)
+        return
+    for combined in results:
+        print(f"volatility {combined['volatility']:<8g} {combined['lot_policy']:<13} wallet {combined['wallet']:>16.2f} "
+              f"realized {combined['realized_pnl']:>14.2f} unrealized {combined['unrealized_pnl']:>14.2f}")
+    print(f"{len(results)} parameter sets in {elapsed_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
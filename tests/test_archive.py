@@ -0,0 +1,33 @@
+import pytest
+
+from archive import TradeArchive
+from engine import TradingEngine
+
+
+def test_page_out_behind_open_lot(tmp_path):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path)), max_live_trades=40)
+    held_trade = engine.add_trade("HOLD", 10.0, 5, 0.0)
+    first_flip = engine.add_trade("FLIP", 20.0, 1, 0.0)
+    engine.sell_trade("FLIP", 1, 0.5)
+    for step in range(1, 200):
+        engine.add_trade("FLIP", 20.0, 1, float(step))
+        engine.sell_trade("FLIP", 1, step + 0.5)
+    assert len(engine.all_trades) - engine.all_trades.carried_count <= 40
+    assert held_trade.trade_id in engine.all_trades.carried_rows
+    with pytest.raises(KeyError):
+        first_flip.index
+    assert engine.open_volume("HOLD") == 5
+    assert engine.totals_between(-1, 1000)["count"] == 1 + 2 * 200
+
+
+def test_archive_reopens_paged_trades(tmp_path):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path)), max_live_trades=40)
+    for step in range(100):
+        engine.add_trade("FLIP", 20.0 + step, 2, float(step))
+        engine.sell_trade("FLIP", 2, step + 0.5)
+    archived_count = len(engine.archive)
+    assert archived_count > 0
+    reopened = TradeArchive(str(tmp_path))
+    assert len(reopened) == archived_count
+    assert list(reopened.trade_ids) == list(range(archived_count))
+    assert reopened.totals_between(-1, 1000).tolist() == pytest.approx(engine.archive.totals_between(-1, 1000).tolist())
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from archive import TradeArchive
+from candles import CandleRing, CandleSeries
+from engine import TradingEngine
+
+
+def brute_force_candles(ticks, period):
+    candles = []
+    for price, timestamp in ticks:
+        start = timestamp - timestamp % period
+        if candles and candles[-1][0] == start:
+            candles[-1][2] = max(candles[-1][2], price)
+            candles[-1][3] = min(candles[-1][3], price)
+            candles[-1][4] = price
+        else:
+            candles.append([start, price, price, price, price])
+    return candles
+
+
+def test_series_rolls_ticks_up_to_every_resolution():
+    rng = np.random.default_rng(17)
+    timestamps = np.cumsum(rng.integers(0, 7, 2000)).astype(float)
+    ticks = list(zip(rng.uniform(5.0, 50.0, 2000).round(2).tolist(), timestamps.tolist()))
+    resolutions = (10, 60, 300, 3600)
+    candle_series = CandleSeries(resolutions, 4096)
+    for price, timestamp in ticks:
+        candle_series.update(price, timestamp)
+    for ring, period in zip(candle_series.rings, resolutions):
+        assert ring.ordered().tolist() == brute_force_candles(ticks, period)
+    assert candle_series.latest_close() == ticks[-1][0]
+
+
+def test_ring_evicts_oldest_half_as_views_in_order():
+    evicted_segments = []
+
+    def collect(segment):
+        assert np.shares_memory(segment, ring.candles)
+        evicted_segments.append(segment.copy())
+
+    ring = CandleRing(1, 5, collect, capacity=2)
+    ring.merge(0, 0.0, 0.0, 0.0, 0.0)
+    for start in range(1, 40):
+        ring.merge(start, start, start + 1.0, start - 1.0, start)
+    assert ring.capacity == 5
+    evicted = np.concatenate(evicted_segments)
+    assert np.concatenate((evicted, ring.ordered()))[:, 0].tolist() == list(range(40))
+    assert 1 in [len(segment) for segment in evicted_segments]
+
+
+def test_ring_without_archive_drops_oldest_candle():
+    ring = CandleRing(1, 4)
+    for start in range(10):
+        ring.merge(start, start, start, start, start)
+    assert ring.ordered()[:, 0].tolist() == [6.0, 7.0, 8.0, 9.0]
+
+
+@pytest.mark.parametrize("resolution", [None, 60, 300])
+def test_history_joins_archived_and_live_candles(tmp_path, resolution):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path)))
+    ticks = [(20.0 + index % 13, 10.0 * index) for index in range(3 * engine.MAX_CANDLES)]
+    for price, timestamp in ticks:
+        engine.apply_price_bars([("AAPL", price, price, price, price, timestamp)])
+    assert len(engine.candles.ring("AAPL")) < len(ticks)
+    history = engine.candle_history("AAPL", resolution=resolution)
+    expected_candles = brute_force_candles(ticks, resolution or engine.CANDLE_RESOLUTIONS[0])
+    assert np.column_stack([history[field] for field in ("start", "open", "high", "low", "close")]).tolist() == expected_candles
+    recent = engine.candle_history("AAPL", start_time=ticks[-20][1], resolution=resolution)
+    assert recent["start"].tolist() == [candle[0] for candle in expected_candles if candle[0] >= ticks[-20][1]]
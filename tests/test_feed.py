@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from engine import TradingEngine
+from feed import FeedIngestor, ReplayFileSource, parse_tick
+
+
+def replay(path):
+    async def collect(source):
+        return [tick async for tick in source.ticks()]
+
+    source = ReplayFileSource(str(path))
+    return source, asyncio.run(collect(source))
+
+
+@pytest.mark.parametrize("line", ["AAPL", "AAPL,abc,1.0", ",10.0,1.0", "AAPL,-1,1.0", "AAPL,nan,1.0", "AAPL,10,inf"])
+def test_parse_tick_rejects_malformed_lines(line):
+    with pytest.raises(ValueError):
+        parse_tick(line)
+
+
+def test_replay_skips_malformed_rows(tmp_path):
+    replay_path = tmp_path / "ticks.csv"
+    replay_path.write_text("timestamp,symbol,price\n1.0,AAPL,10.5\n2.0,AAPL,\nbad,MSFT,20\n3.0,MSFT,20.25\n")
+    source, ticks = replay(replay_path)
+    assert ticks == [("AAPL", 10.5, 1.0), ("MSFT", 20.25, 3.0)]
+    assert source.skipped_ticks == 2
+
+
+def test_replay_requires_columns(tmp_path):
+    replay_path = tmp_path / "ticks.csv"
+    replay_path.write_text("time,symbol,price\n1.0,AAPL,10.5\n")
+    with pytest.raises(ValueError, match="timestamp"):
+        replay(replay_path)
+
+
+def test_ingestor_finishes_with_its_replay(tmp_path):
+    replay_path = tmp_path / "ticks.csv"
+    replay_path.write_text("timestamp,symbol,price\n1.0,AAPL,10.5\n2.0,AAPL,11.0\n")
+    engine = TradingEngine()
+    ingestor = FeedIngestor(engine, ReplayFileSource(str(replay_path)), flush_interval=0.01)
+    ingestor.start()
+    ingestor.join(5.0)
+    assert not ingestor.is_alive()
+    assert ingestor.error is None
+    assert "AAPL" in engine.symbols()
+    assert engine.latest_price("AAPL") == 11.0
+    ingestor.stop()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from engine import Heap
+
+
+def assert_consistent(heap, expected_keys):
+    assert len(heap) == len(expected_keys)
+    assert set(heap.positions) == set(expected_keys)
+    for item, index in heap.positions.items():
+        assert heap.data[index][2] == item
+    for index in range(1, len(heap.data)):
+        assert not heap.data[index] < heap.data[(index - 1) // 2]
+
+
+def ranked(expected_keys, mode):
+    return sorted(expected_keys, key=lambda item: -expected_keys[item] if mode == "max" else expected_keys[item])
+
+
+@pytest.mark.parametrize("mode", ["min", "max"])
+def test_heap_matches_sorted_brute_force(mode):
+    random_generator = random.Random(1)
+    heap = Heap(mode)
+    expected_keys = {}
+    next_item = 0
+    for step in range(3000):
+        action = random_generator.random()
+        if action < 0.4 or not expected_keys:
+            key = random_generator.uniform(-100, 100)
+            heap.push(next_item, key)
+            expected_keys[next_item] = key
+            next_item += 1
+        elif action < 0.6:
+            item = random_generator.choice(list(expected_keys))
+            key = random_generator.uniform(-100, 100)
+            heap.update(item, key)
+            expected_keys[item] = key
+        elif action < 0.75:
+            item = random_generator.choice(list(expected_keys))
+            heap.remove(item)
+            del expected_keys[item]
+        elif action < 0.85:
+            top_item = ranked(expected_keys, mode)[0]
+            assert heap.pop() == top_item
+            del expected_keys[top_item]
+        else:
+            items = random_generator.sample(list(expected_keys), random_generator.randint(1, len(expected_keys)))
+            keys = [random_generator.uniform(-100, 100) for item in items]
+            heap.update_many(items, keys)
+            expected_keys.update(zip(items, keys))
+        assert_consistent(heap, expected_keys)
+        if expected_keys:
+            assert heap.peek() == ranked(expected_keys, mode)[0]
+    assert heap.top(25) == ranked(expected_keys, mode)[:25]
+
+
+def test_build_breaks_ties_by_insertion_order():
+    heap = Heap("max")
+    heap.build(["a", "b", "c", "d"], [1.0, 3.0, 3.0, 2.0])
+    assert heap.top(10) == ["b", "c", "d", "a"]
+    assert [heap.pop() for step in range(4)] == ["b", "c", "d", "a"]
+    assert heap.pop() is None
+    assert heap.peek() is None
+
+
+def test_unknown_items_are_ignored():
+    heap = Heap()
+    heap.push("a", 1.0)
+    heap.update("b", 5.0)
+    heap.remove("b")
+    heap.update_many(["b"], [0.0])
+    assert heap.top(5) == ["a"]
+    assert "b" not in heap
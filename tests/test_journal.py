@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pytest
+
+import journal
+from archive import TradeArchive
+from journal import is_journal_file, recover
+
+
+def record_history(engine, count=300):
+    for step in range(count):
+        symbol = f"S{step % 7}"
+        engine.add_trade(symbol, 10.0 + step % 5, 3, float(step))
+        if step % 3 == 0:
+            engine.sell_trade(symbol, 2, step + 0.5)
+        if step % 50 == 0:
+            engine.update_all_prices(step + 0.75)
+
+
+def engine_state(engine):
+    return (engine.wallet, engine.portfolio_valuation(), engine.totals_between(-1, 1e9), engine.symbols(),
+            [trade.trade_id for trade in engine.trades_between(-1, 1e9)])
+
+
+def assert_same_state(engine, expected_state):
+    wallet, valuation, totals, symbols, trade_ids = engine_state(engine)
+    assert wallet == pytest.approx(expected_state[0])
+    assert valuation == pytest.approx(expected_state[1])
+    assert totals == pytest.approx(expected_state[2])
+    assert symbols == expected_state[3]
+    assert trade_ids == expected_state[4]
+
+
+def crash(engine):
+    engine.journal.sync()
+    engine.journal.file.close()
+
+
+def test_recovery_round_trip(tmp_path):
+    engine = recover(str(tmp_path), snapshot_every=100, max_live_trades=120)
+    record_history(engine)
+    expected_state = engine_state(engine)
+    engine.close()
+    assert_same_state(recover(str(tmp_path), max_live_trades=120), expected_state)
+
+
+def test_recovery_after_crash_replays_journal(tmp_path):
+    engine = recover(str(tmp_path), snapshot_every=100000, max_live_trades=120)
+    record_history(engine)
+    expected_state = engine_state(engine)
+    crash(engine)
+    assert_same_state(recover(str(tmp_path), max_live_trades=120), expected_state)
+
+
+def test_crash_during_replay_does_not_archive_twice(tmp_path, monkeypatch):
+    engine = recover(str(tmp_path), snapshot_every=100000)
+    record_history(engine)
+    expected_state = engine_state(engine)
+    crash(engine)
+    replay_record = journal.replay_record
+    replayed_count = []
+
+    def failing_replay(engine, record_type, payload):
+        if len(replayed_count) == 350:
+            raise RuntimeError("crash during replay")
+        replayed_count.append(record_type)
+        replay_record(engine, record_type, payload)
+
+    monkeypatch.setattr(journal, "replay_record", failing_replay)
+    with pytest.raises(RuntimeError):
+        recover(str(tmp_path), max_live_trades=120)
+    assert len(TradeArchive(str(tmp_path))) > 0
+    monkeypatch.setattr(journal, "replay_record", replay_record)
+    recovered = recover(str(tmp_path), max_live_trades=120)
+    archived_ids = recovered.archive.trade_ids
+    assert len(archived_ids) > 0
+    assert len(np.unique(archived_ids)) == len(archived_ids)
+    assert_same_state(recovered, expected_state)
+
+
+def test_snapshots_rotate_the_journal(tmp_path):
+    engine = recover(str(tmp_path), snapshot_every=50)
+    record_history(engine, 600)
+    journal_files = [file_name for file_name in os.listdir(tmp_path) if is_journal_file(file_name)]
+    assert journal_files == [journal.journal_file_name(engine.journal.generation)]
+    assert os.path.getsize(tmp_path / journal_files[0]) < 50 * 200
+    expected_state = engine_state(engine)
+    crash(engine)
+    assert_same_state(recover(str(tmp_path)), expected_state)
+
+
+@pytest.mark.parametrize("clean_shutdown", [False, True])
+def test_recovery_keeps_feed_only_symbols_and_bars(tmp_path, clean_shutdown):
+    engine = recover(str(tmp_path))
+    engine.apply_price_bars([(f"F{index}", 10.0 + index, 12.0 + index, 9.0 + index, 11.0 + index, 100.0) for index in range(100)])
+    engine.apply_price_bars([(f"F{index}", 11.0 + index, 15.0 + index, 8.0 + index, 13.0 + index, 101.0) for index in range(100)])
+    engine.add_trade("F70", 50.0, 3, 102.0)
+    expected_state = engine_state(engine)
+    expected_candles = engine.candle_history("F5")
+    if clean_shutdown:
+        engine.close()
+    else:
+        crash(engine)
+    recovered = recover(str(tmp_path))
+    assert_same_state(recovered, expected_state)
+    assert len(recovered.all_trades.price_book) == 100
+    assert recovered.all_trades.market_price("F99") == 112.0
+    for field, values in recovered.candle_history("F5").items():
+        assert values.tolist() == expected_candles[field].tolist()
+    assert expected_candles["high"].tolist() == [20.0]
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from engine import Leaderboard, TradingEngine
+
+
+def expected_top(engine, count, symbol=None, worst=False):
+    if symbol is not None and symbol.lower() not in engine.all_trades.symbol_ids_by_key:
+        return []
+    open_trades = [engine.all_trades[index] for index in engine.all_trades.open_buy_indices(symbol).tolist()]
+    ranked = sorted(open_trades, key=lambda trade: (trade.performance_metric() if worst else -trade.performance_metric(), trade.trade_id))
+    return [trade.trade_id for trade in ranked[:count]]
+
+
+def random_engine(seed, count=2000):
+    random_generator = random.Random(seed)
+    engine = TradingEngine()
+    for step in range(count):
+        symbol = f"S{random_generator.randint(0, 6)}"
+        roll = random_generator.random()
+        if roll < 0.3 and engine.open_volume(symbol) > 0:
+            engine.sell_trade(symbol, random_generator.randint(1, engine.open_volume(symbol)), float(step))
+        elif roll < 0.35:
+            engine.price_tick(float(step))
+        elif roll < 0.4 and engine.open_volume(symbol) > 0:
+            engine.set_sell_price(symbol, random_generator.uniform(40, 60), float(step))
+        else:
+            engine.add_trade(symbol, round(random_generator.uniform(40, 60), 1), random_generator.randint(1, 5), float(step))
+        if step % 97 == 0:
+            yield engine
+    yield engine
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_top_trades_match_brute_force(seed):
+    for engine in random_engine(seed):
+        for symbol in (None, "S0", "s3"):
+            for count in (1, 5, Leaderboard.CAPACITY, Leaderboard.CAPACITY + 10):
+                for worst in (False, True):
+                    top_trades = engine.top_trades(count, symbol, worst)
+                    assert [trade.trade_id for trade in top_trades] == expected_top(engine, count, symbol, worst)
+                    assert all(trade.is_open for trade in top_trades)
+        best_trade = engine.best_trade()
+        assert (best_trade and best_trade.trade_id) == (expected_top(engine, 1) or [None])[0]
+
+
+def test_price_tick_reranks_before_reads():
+    engine = TradingEngine()
+    for index in range(50):
+        engine.add_trade(f"S{index % 5}", 50.0 + index, 10, float(index))
+    engine.price_tick(100.0)
+    assert not engine.stale_symbol_ids
+    assert [trade.trade_id for trade in engine.top_trades(5)] == expected_top(engine, 5)
+
+
+def test_leaderboards_stay_bounded():
+    engine = TradingEngine()
+    for index in range(5000):
+        engine.add_trade(f"S{index % 3}", 10.0 + index % 97, 1 + index % 7, float(index))
+    engine.price_tick(5000.0)
+    engine.best_trade()
+    leaderboards = engine.transaction_tracker.symbol_leaderboards
+    assert len(leaderboards) == 3
+    assert all(len(leaderboard.best_entries) == len(leaderboard.worst_entries) == Leaderboard.CAPACITY for leaderboard in leaderboards.values())
+
+
+def test_unknown_symbol_has_no_top_trades():
+    engine = TradingEngine()
+    engine.add_trade("AAPL", 10.0, 1, 1.0)
+    assert engine.top_trades(5, "MSFT") == []
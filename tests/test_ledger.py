@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from archive import TradeArchive
+from engine import PositionLedger, TradingEngine
+
+SYMBOLS = [f"S{index}" for index in range(6)]
+
+
+def random_activity(engine, seed, count=1200):
+    random_generator = random.Random(seed)
+    expected_positions = {symbol: {"open_volume": 0, "cost_basis": 0.0, "realized_pnl": 0.0} for symbol in SYMBOLS}
+    timestamp = 0.0
+    for step in range(count):
+        timestamp += 1.0
+        symbol = random_generator.choice(SYMBOLS)
+        expected_position = expected_positions[symbol]
+        action = random_generator.random()
+        if action < 0.3 and engine.open_volume(symbol) > 0:
+            engine.set_sell_price(symbol, round(random_generator.uniform(40, 60), 2), timestamp)
+            for sell_trade in engine.sell_trade(symbol, random_generator.randint(1, engine.open_volume(symbol)), timestamp):
+                expected_position["open_volume"] -= sell_trade.volume
+                expected_position["cost_basis"] -= sell_trade.original_price * sell_trade.volume
+                expected_position["realized_pnl"] += (sell_trade.price - sell_trade.original_price) * sell_trade.volume
+        elif action < 0.4:
+            engine.update_all_prices(timestamp)
+        else:
+            price = round(random_generator.uniform(40, 60), 2)
+            volume = random_generator.randint(1, 20)
+            engine.add_trade(symbol, price, volume, timestamp)
+            expected_position["open_volume"] += volume
+            expected_position["cost_basis"] += price * volume
+    return expected_positions
+
+
+def assert_matches(engine, ledger, expected_positions):
+    store = engine.all_trades
+    expected_totals = {"cost_basis": 0.0, "market_value": 0.0, "realized_pnl": 0.0}
+    for symbol, expected_position in expected_positions.items():
+        position = ledger.position(store.symbol_id(symbol))
+        market_price = store.market_price(symbol)
+        market_value = expected_position["open_volume"] * market_price
+        assert position["open_volume"] == expected_position["open_volume"]
+        assert position["cost_basis"] == pytest.approx(expected_position["cost_basis"], abs=1e-6)
+        assert position["realized_pnl"] == pytest.approx(expected_position["realized_pnl"], abs=1e-6)
+        assert position["market_value"] == pytest.approx(market_value)
+        assert position["unrealized_pnl"] == pytest.approx(market_value - expected_position["cost_basis"], abs=1e-6)
+        expected_totals["cost_basis"] += expected_position["cost_basis"]
+        expected_totals["market_value"] += market_value
+        expected_totals["realized_pnl"] += expected_position["realized_pnl"]
+    totals = ledger.totals()
+    for field, expected_total in expected_totals.items():
+        assert totals[field] == pytest.approx(expected_total, abs=1e-6)
+    assert totals["unrealized_pnl"] == pytest.approx(expected_totals["market_value"] - expected_totals["cost_basis"], abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", [3, 11])
+def test_ledger_matches_brute_force(seed):
+    engine = TradingEngine()
+    expected_positions = random_activity(engine, seed)
+    assert_matches(engine, engine.position_ledger, expected_positions)
+
+
+def test_rebuilt_ledger_counts_archived_sells(tmp_path):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path)), max_live_trades=100)
+    expected_positions = random_activity(engine, 5)
+    assert len(engine.archive) > 0
+    assert_matches(engine, engine.position_ledger, expected_positions)
+    rebuilt_ledger = PositionLedger(engine.all_trades)
+    rebuilt_ledger.rebuild(engine.archive)
+    assert_matches(engine, rebuilt_ledger, expected_positions)
+
+
+def test_position_of_unseen_symbol_is_empty():
+    engine = TradingEngine()
+    engine.add_trade("AAPL", 10.0, 2, 1.0)
+    engine.all_trades.set_market_price("MSFT", 30.0)
+    position = engine.position("MSFT")
+    assert position["open_volume"] == 0
+    assert position["realized_pnl"] == 0.0
+    assert position["market_price"] == 30.0
@@ -0,0 +1,48 @@
+import pytest
+
+from engine import TradingEngine
+
+
+def sold_lots(lot_policy, volume):
+    engine = TradingEngine(lot_policy=lot_policy)
+    engine.add_trade("AAPL", 100.0, 5, 1.0)
+    engine.add_trade("AAPL", 120.0, 5, 2.0)
+    engine.add_trade("AAPL", 90.0, 5, 3.0)
+    engine.all_trades.set_market_price("AAPL", 110.0)
+    return engine, [(trade.original_price, trade.volume) for trade in engine.sell_trade("AAPL", volume, 4.0)]
+
+
+@pytest.mark.parametrize("lot_policy, expected_lots", [
+    ("fifo", [(100.0, 5), (120.0, 2)]),
+    ("lifo", [(90.0, 5), (120.0, 2)]),
+    ("highest_cost", [(120.0, 5), (100.0, 2)]),
+])
+def test_sells_consume_lots_in_policy_order(lot_policy, expected_lots):
+    engine, lots = sold_lots(lot_policy, 7)
+    assert lots == expected_lots
+    assert engine.open_volume("AAPL") == 8
+    assert engine.position("AAPL")["open_volume"] == 8
+
+
+def test_unknown_lot_policy_is_rejected():
+    with pytest.raises(ValueError):
+        TradingEngine(lot_policy="random")
+
+
+@pytest.mark.parametrize("volume", [0, -1, 16])
+def test_invalid_sell_volume_changes_nothing(volume):
+    engine, _ = sold_lots("fifo", 1)
+    wallet = engine.wallet
+    with pytest.raises(ValueError):
+        engine.sell_trade("AAPL", volume, 5.0)
+    assert engine.open_volume("AAPL") == 14
+    assert engine.wallet == wallet
+
+
+def test_sells_resolve_symbols_case_insensitively():
+    engine = TradingEngine()
+    engine.add_trade("AAPL", 100.0, 10, 1.0)
+    sell_trades = engine.sell_trade("aapl", 4, 2.0)
+    assert [trade.symbol for trade in sell_trades] == ["AAPL"]
+    assert engine.open_volume("Aapl") == 6
+    assert engine.symbols() == ["AAPL"]
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from archive import TradeArchive
+from engine import TradingEngine
+
+
+def random_history(engine, seed, count=1500):
+    random_generator = random.Random(seed)
+    expected_rows = []
+    timestamp = 0.0
+    for step in range(count):
+        timestamp += random_generator.choice([0.0, 0.5, 1.0])
+        symbol = f"S{random_generator.randint(0, 4)}"
+        if random_generator.random() < 0.3 and engine.open_volume(symbol) > 0:
+            engine.all_trades.set_market_price(symbol, random_generator.uniform(40, 60))
+            for sell_trade in engine.sell_trade(symbol, random_generator.randint(1, engine.open_volume(symbol)), timestamp):
+                expected_rows.append((timestamp, sell_trade.trade_id, sell_trade.volume,
+                                      sell_trade.price * sell_trade.volume, sell_trade.performance_metric()))
+        else:
+            price = random_generator.uniform(40, 60)
+            volume = random_generator.randint(1, 20)
+            buy_trade = engine.add_trade(symbol, price, volume, timestamp)
+            expected_rows.append((timestamp, buy_trade.trade_id, volume, price * volume, 0.0))
+        if step % 400 == 0:
+            engine.update_all_prices(timestamp)
+    return expected_rows
+
+
+def check_avl(node):
+    if node is None:
+        return 0, 0, 0
+    left_height, left_count, left_volume = check_avl(node.left)
+    right_height, right_count, right_volume = check_avl(node.right)
+    assert node.height == 1 + max(left_height, right_height)
+    assert abs(left_height - right_height) <= 1
+    assert node.count == 1 + left_count + right_count
+    assert node.total_volume == node.volume + left_volume + right_volume
+    assert node.volume == node.trade.original_volume
+    if node.left is not None:
+        assert (node.left.key, node.left.trade.trade_id) < (node.key, node.trade.trade_id)
+    if node.right is not None:
+        assert (node.right.key, node.right.trade.trade_id) > (node.key, node.trade.trade_id)
+    return node.height, node.count, node.total_volume
+
+
+def check_ranges(engine, expected_rows, seed):
+    random_generator = random.Random(seed)
+    for _ in range(150):
+        start_time = random_generator.uniform(-5, 1200)
+        end_time = start_time + random_generator.uniform(0, 300)
+        rows = [row for row in expected_rows if start_time <= row[0] <= end_time]
+        totals = engine.totals_between(start_time, end_time)
+        assert totals["count"] == len(rows)
+        assert totals["volume"] == sum(row[2] for row in rows)
+        assert totals["notional"] == pytest.approx(sum(row[3] for row in rows))
+        assert totals["metric"] == pytest.approx(sum(row[4] for row in rows), abs=1e-6)
+        trades = engine.trades_between(start_time, end_time)
+        assert [trade.trade_id for trade in trades] == [row[1] for row in sorted(rows, key=lambda row: (row[0], row[1]))]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_range_queries_match_brute_force(seed):
+    engine = TradingEngine()
+    expected_rows = random_history(engine, seed)
+    check_avl(engine.portfolio_manager.root)
+    check_ranges(engine, expected_rows, seed)
+    engine.rebuild_indexes()
+    check_avl(engine.portfolio_manager.root)
+    check_ranges(engine, expected_rows, seed)
+
+
+def test_range_queries_span_archive(tmp_path):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path)), max_live_trades=300)
+    expected_rows = random_history(engine, 7)
+    assert len(engine.archive) > 0
+    check_avl(engine.portfolio_manager.root)
+    check_ranges(engine, expected_rows, 7)
+
+
+def test_range_queries_with_out_of_order_timestamps(tmp_path):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path)), max_live_trades=50)
+    random_generator = random.Random(11)
+    expected_rows = []
+    for _ in range(400):
+        timestamp = random_generator.uniform(0, 1000)
+        buy_trade = engine.add_trade("S", 50.0, 2, timestamp)
+        expected_rows.append((timestamp, buy_trade.trade_id, 2, 100.0, 0.0))
+        engine.all_trades.set_market_price("S", 55.0)
+        timestamp = random_generator.uniform(0, 1000)
+        for sell_trade in engine.sell_trade("S", 2, timestamp):
+            expected_rows.append((timestamp, sell_trade.trade_id, 2, 110.0, 10.0))
+    assert len(engine.archive) > 0
+    assert len(engine.all_trades) - engine.all_trades.carried_count <= 50
+    check_avl(engine.portfolio_manager.root)
+    check_ranges(engine, expected_rows, 11)
+    expected_keys = sorted((row[0], row[1]) for row in expected_rows)
+    for timestamp in (-1.0, 0.5, 250.0, expected_keys[100][0], 999.5, 1001.0):
+        floor_keys = [key for key in expected_keys if key[0] <= timestamp]
+        ceiling_keys = [key for key in expected_keys if key[0] >= timestamp]
+        floor_trade = engine.portfolio_manager.floor(timestamp)
+        ceiling_trade = engine.portfolio_manager.ceiling(timestamp)
+        assert (floor_trade and (floor_trade.timestamp, floor_trade.trade_id)) == (floor_keys[-1] if floor_keys else None)
+        assert (ceiling_trade and (ceiling_trade.timestamp, ceiling_trade.trade_id)) == (ceiling_keys[0] if ceiling_keys else None)
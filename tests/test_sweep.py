@@ -0,0 +1,29 @@
+import pytest
+
+from backtest import synthetic_events
+from sweep import run_sweep, shard_symbols
+
+
+def test_shard_symbols_covers_every_symbol_once():
+    symbols = [f"SYM{index}" for index in range(7)]
+    shards = shard_symbols(symbols, 3)
+    assert len(shards) == 3
+    assert sorted(symbol for shard in shards for symbol in shard) == sorted(symbols)
+    assert shard_symbols(symbols, 20) == [[symbol] for symbol in symbols]
+
+
+@pytest.mark.parametrize("shard_count", [2, 3])
+def test_sharded_sweep_matches_unsharded(shard_count):
+    events = list(synthetic_events(1500, [f"SYM{index}" for index in range(6)], seed=3))
+    volatilities = [0.02, 0.1]
+    lot_policies = ["fifo", "lifo"]
+    unsharded = run_sweep(events, volatilities, lot_policies, 1, seed=5, workers=1)
+    sharded = run_sweep(events, volatilities, lot_policies, shard_count, seed=5, workers=1)
+    assert len(sharded) == len(unsharded) == 4
+    for expected, combined in zip(unsharded, sharded):
+        assert (combined["volatility"], combined["lot_policy"]) == (expected["volatility"], expected["lot_policy"])
+        assert len(combined["shards"]) == shard_count
+        for field in ("events", "ticks", "rejected", "trades", "open_positions"):
+            assert combined[field] == expected[field]
+        for field in ("wallet", "realized_pnl", "unrealized_pnl"):
+            assert combined[field] == pytest.approx(expected[field])
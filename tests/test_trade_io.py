@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from archive import TradeArchive
+from engine import TradingEngine
+from trade_io import export_trades, import_trades
+
+
+def trading_history(engine, seed, count=600):
+    random_generator = random.Random(seed)
+    for step in range(count):
+        symbol = f"S{random_generator.randint(0, 3)}"
+        if random_generator.random() < 0.35 and engine.open_volume(symbol) > 0:
+            engine.all_trades.set_market_price(symbol, random_generator.uniform(40, 60))
+            engine.sell_trade(symbol, random_generator.randint(1, engine.open_volume(symbol)), float(step))
+        else:
+            engine.add_trade(symbol, random_generator.uniform(40, 60), random_generator.randint(1, 20), float(step))
+
+
+def assert_same_book(engine, imported):
+    assert imported.wallet == pytest.approx(engine.wallet)
+    assert imported.symbols() == engine.symbols()
+    for symbol in engine.symbols():
+        assert imported.open_volume(symbol) == engine.open_volume(symbol)
+        assert imported.position(symbol)["realized_pnl"] == pytest.approx(engine.position(symbol)["realized_pnl"])
+        assert imported.position(symbol)["cost_basis"] == pytest.approx(engine.position(symbol)["cost_basis"])
+    assert imported.totals_between(-1, 1e9) == pytest.approx(engine.totals_between(-1, 1e9))
+
+
+@pytest.mark.parametrize("file_name", ["trades.csv", "trades.parquet"])
+def test_export_round_trips_through_import(tmp_path, file_name):
+    if file_name.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    engine = TradingEngine()
+    trading_history(engine, 3)
+    export_trades(engine, str(tmp_path / file_name))
+    imported = TradingEngine()
+    assert import_trades(imported, str(tmp_path / file_name)) == len(engine.all_trades)
+    assert_same_book(engine, imported)
+
+
+def test_export_round_trips_with_archived_trades(tmp_path):
+    engine = TradingEngine(archive=TradeArchive(str(tmp_path / "archive")), max_live_trades=60)
+    engine.add_trade("HOLD", 25.0, 7, -1.0)
+    trading_history(engine, 4)
+    assert len(engine.archive) > 0 and engine.all_trades.carried_count > 0
+    export_trades(engine, str(tmp_path / "trades.csv"))
+    imported = TradingEngine()
+    assert import_trades(imported, str(tmp_path / "trades.csv")) == len(engine.archive) + len(engine.all_trades) - engine.all_trades.carried_count
+    assert_same_book(engine, imported)
+
+
+def test_import_error_names_the_row_and_keeps_earlier_rows(tmp_path):
+    trades_path = tmp_path / "trades.csv"
+    trades_path.write_text("timestamp,symbol,trade_type,price,volume\n1,AAPL,Buy,100,5\n2,AAPL,Sell,110,2\n3,AAPL,Sell,110,9\n")
+    engine = TradingEngine()
+    with pytest.raises(ValueError) as error_info:
+        import_trades(engine, str(trades_path))
+    message = str(error_info.value)
+    assert message.startswith("Row 4:")
+    assert "2 earlier rows were imported and kept." in message
+    assert engine.open_volume("AAPL") == 3
+
+
+@pytest.mark.parametrize("row", ["AAPL,100,-5", "AAPL,100,0", "AAPL,-1,5", "AAPL,nan,5"])
+def test_import_rejects_non_positive_buys(tmp_path, row):
+    trades_path = tmp_path / "trades.csv"
+    trades_path.write_text(f"symbol,price,volume\n{row}\n")
+    engine = TradingEngine()
+    with pytest.raises(ValueError, match="Row 2:"):
+        import_trades(engine, str(trades_path))
+    assert engine.wallet == TradingEngine.STARTING_WALLET
+    assert len(engine.all_trades) == 0
+
+
+@pytest.mark.parametrize("price, volume", [(100.0, -5), (100.0, 0), (0.0, 5), (float("nan"), 5)])
+def test_engine_rejects_non_positive_buys(price, volume):
+    engine = TradingEngine()
+    with pytest.raises(ValueError):
+        engine.add_trade("AAPL", price, volume, 1.0)
+    assert engine.wallet == TradingEngine.STARTING_WALLET
+    assert engine.open_volume("AAPL") == 0
+    assert engine.portfolio_valuation()["cost_basis"] == 0
@@ -0,0 +1,156 @@
+import csv
+import itertools
+import os
+
+import numpy as np
+
+from engine import TradeRowError, TradeStore
+
+BATCH_SIZE = 10000
+EXPORT_FIELDS = ("trade_id", "timestamp", "symbol", "trade_type", "price", "volume", "original_price")
+
+
+def is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def parse_row(line_number, symbol, price, volume, timestamp=None, trade_type=None):
+    try:
+        symbol = str(symbol).strip()
+        if not symbol:
+            raise ValueError("missing stock symbol")
+        trade_type = str(trade_type).strip().capitalize() if trade_type not in (None, "") else "Buy"
+        if trade_type not in TradeStore.TRADE_TYPES:
+            raise ValueError(f"unknown trade type {trade_type!r}")
+        timestamp = float(timestamp) if timestamp not in (None, "") else None
+        price = float(price)
+        volume = int(volume)
+        if not price > 0:
+            raise ValueError(f"price must be positive, got {price}")
+        if volume <= 0:
+            raise ValueError(f"volume must be positive, got {volume}")
+        return timestamp, symbol, trade_type, price, volume
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Row {line_number}: {error}") from None
+
+
+def read_csv_rows(path):
+    with open(path, newline="") as csv_file:
+        reader = csv.DictReader(csv_file)
+        missing_fields = {"symbol", "price", "volume"} - set(reader.fieldnames or ())
+        if missing_fields:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing_fields))}")
+        for line_number, row in enumerate(reader, start=2):
+            yield parse_row(line_number, row["symbol"], row["price"], row["volume"], row.get("timestamp"), row.get("trade_type"))
+
+
+def read_parquet_rows(path, batch_size=BATCH_SIZE):
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(path)
+    field_names = set(parquet_file.schema_arrow.names)
+    missing_fields = {"symbol", "price", "volume"} - field_names
+    if missing_fields:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing_fields))}")
+    line_number = 1
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = record_batch.to_pydict()
+        row_count = record_batch.num_rows
+        timestamps = columns.get("timestamp", itertools.repeat(None, row_count))
+        trade_types = columns.get("trade_type", itertools.repeat(None, row_count))
+        for symbol, price, volume, timestamp, trade_type in zip(columns["symbol"], columns["price"], columns["volume"], timestamps, trade_types):
+            yield parse_row(line_number, symbol, price, volume, timestamp, trade_type)
+            line_number += 1
+
+
+def read_rows(path, batch_size=BATCH_SIZE):
+    return read_parquet_rows(path, batch_size) if is_parquet(path) else read_csv_rows(path)
+
+
+def apply_batch(engine, batch, first_row_number):
+    if not batch:
+        return 0
+    with engine.lock:
+        return engine.add_trades(batch, first_row_number)
+
+
+def import_trades(engine, path, batch_size=BATCH_SIZE):
+    imported_count = 0
+    first_row_number = 1 if is_parquet(path) else 2
+    batch = []
+    try:
+        try:
+            for row in read_rows(path, batch_size):
+                batch.append(row)
+                if len(batch) == batch_size:
+                    pending_batch, batch = batch, []
+                    imported_count += apply_batch(engine, pending_batch, first_row_number + imported_count)
+        finally:
+            pending_batch, batch = batch, []
+            imported_count += apply_batch(engine, pending_batch, first_row_number + imported_count)
+    except ValueError as error:
+        if isinstance(error, TradeRowError):
+            imported_count += error.rows_applied
+        if imported_count:
+            rows_kept = "1 earlier row was" if imported_count == 1 else f"{imported_count} earlier rows were"
+            raise ValueError(f"{error}\n{rows_kept} imported and kept.") from None
+        raise
+    return imported_count
+
+
+def export_batches(engine, batch_size=BATCH_SIZE):
+    store = engine.all_trades
+    symbols = np.array(store.symbols, dtype=object)
+    trade_types = np.array(TradeStore.TRADE_TYPES, dtype=object)
+    sell_type = TradeStore.TRADE_TYPES.index("Sell")
+    sources = [(store, store.trade_ids(), store.carried_count, len(store))]
+    if engine.archive is not None and len(engine.archive):
+        sources.insert(0, (engine.archive, engine.archive.trade_ids, 0, len(engine.archive)))
+    for source, trade_ids, first_row, row_count in sources:
+        for start in range(first_row, row_count, batch_size):
+            rows = slice(start, min(start + batch_size, row_count))
+            is_sell = source.trade_types[rows] == sell_type
+            yield {
+                "trade_id": np.asarray(trade_ids[rows]),
+                "timestamp": np.asarray(source.timestamps[rows]),
+                "symbol": symbols[source.symbol_ids[rows]],
+                "trade_type": trade_types[source.trade_types[rows]],
+                "price": np.where(is_sell, source.prices[rows], source.original_prices[rows]),
+                "volume": np.where(is_sell, source.volumes[rows], source.original_volumes[rows]),
+                "original_price": np.asarray(source.original_prices[rows]),
+            }
+
+
+def write_csv(batches, path):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(EXPORT_FIELDS)
+        for batch in batches:
+            writer.writerows(zip(*(batch[field].tolist() for field in EXPORT_FIELDS)))
+
+
+def write_parquet(batches, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([
+        ("trade_id", pa.int64()),
+        ("timestamp", pa.float64()),
+        ("symbol", pa.string()),
+        ("trade_type", pa.string()),
+        ("price", pa.float64()),
+        ("volume", pa.int64()),
+        ("original_price", pa.float64()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            writer.write_batch(pa.record_batch([batch[field].tolist() if batch[field].dtype == object else batch[field] for field in EXPORT_FIELDS], schema=schema))
+
+
+def export_trades(engine, path, batch_size=BATCH_SIZE):
+    temporary_path = path + ".tmp"
+    with engine.lock:
+        batches = export_batches(engine, batch_size)
+        if is_parquet(path):
+            write_parquet(batches, temporary_path)
+        else:
+            write_csv(batches, temporary_path)
+    os.replace(temporary_path, path)